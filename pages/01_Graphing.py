@@ -28,6 +28,8 @@ if 'current_tiff_path' not in st.session_state:
     st.session_state.current_tiff_path = None
 if 'needs_processing' not in st.session_state:
     st.session_state.needs_processing = False
+if 'weather_counted' not in st.session_state:
+    st.session_state.weather_counted = set()  # Locations this session has counted towards prefetch
 
 # Function to clean up old temporary files
 def cleanup_old_temp_files():
@@ -45,42 +47,43 @@ def cleanup_old_temp_files():
 from components.sidebar import show_sidebar # Import sidebar
 show_sidebar()
 
-from src.topography.graph_types.terrain_3d import create_3d_plot, create_adjusted_3d_plot, downsample_for_3d
-from src.topography.graph_types.ridge_plots import create_ridge_plot_optimized, create_adjusted_ridge_plot
-from src.topography.graph_types.dem_plots import create_dem_plot, create_adjusted_dem_plot
-from src.map_utils.map_operations import create_map, get_map_parameters
-from src.weather.get_weather import get_weather_data
+from dotenv import load_dotenv
+load_dotenv() # Load environment variables
+
+# Only light modules are imported up front. rasterio, matplotlib, plotly, cv2,
+# folium and pandas are imported in the branch of the visualization that needs them.
+from src.topography.terrain_derivatives import compute_terrain_derivatives, load_dem_with_halo
+from src.topography.progressive import start_refinement, check_cancelled, run_with_budget, load_preview
+from src.topography.render_pool import get_render_pool, bounds_params, RenderQueueFull
+from src.map_utils.dem_tile_server import get_tile_server
+from src.weather.get_weather import get_weather_data, record_weather_request
 from src.config.data_source_config import get_data_source, get_base_path
 from src.data_sources.file_parseing import combine_tiff_files, calculate_zoom_bounds
 from src.database.db_utils import (
     get_all_states, 
     get_cities_in_state, 
-    get_city_info,
-    get_city_zipcodes,
-    get_city_ips
-)
-from src.topography.topography_operations import (
-    load_and_downsample_tiff,
-    load_and_resize,
-    clamp_bounds
+    get_city_details_many,
+    get_city_zipcodes_page,
+    count_city_zipcodes,
+    get_city_ips_page,
+    count_city_ips,
+    cities_in_bounds,
+    search_cities
 )
-from streamlit_folium import st_folium
-from dotenv import load_dotenv
-load_dotenv() # Load environment variables
 
-import matplotlib.pyplot as plt
-import pandas as pd
 import tempfile
-import folium
-import gc
 import os
-import threading
+import time
 from PIL import Image
-import io
-from tqdm import tqdm
-from src.satellite.get_satellite import get_satellite_image
-import cv2
 
+# Streaming satellite preview: repaint every N tiles or after this many seconds
+SATELLITE_REPAINT_TILES = 16
+SATELLITE_REPAINT_SECONDS = 0.3
+SATELLITE_PREVIEW_WIDTH = 800
+# Rows per page in the zip code and IP address tabs
+LIST_PAGE_SIZE = 50
+# Mosaic size for the satellite texture draped on the 3D view
+SATELLITE_TEXTURE_PIXEL_BUDGET = 1024 * 1024
 
 
 
@@ -109,9 +112,152 @@ def load_states():
 def load_cities(state):
     return get_cities_in_state(state)
 
+@st.cache_data(max_entries=1000)
+def load_city_search(query):
+    return search_cities(query, limit=10)
+
+# "City, State" or an IP address -> (lat, lon); the local database answers
+# first and the network geocoders are only asked on a miss
+@st.cache_data(max_entries=256)
+def load_place_coordinates(place):
+    import ipaddress
+    from src.map_utils.map_operations import get_location_from_city, get_location_from_ip
+    place = place.strip()
+    try:
+        ipaddress.ip_address(place)
+    except ValueError:
+        pass
+    else:
+        return get_location_from_ip(place)
+    city, _, state = place.rpartition(',')
+    if not city.strip() or not state.strip():
+        raise ValueError("Enter a place as 'City, State' or an IP address")
+    return get_location_from_city(city.strip(), state.strip())
+
 @st.cache_data
 def load_city_info(city, state):
-    return get_city_info(city, state)
+    # Info, zip codes and zip / IP counts in one query; IPs are paged in their tab
+    return get_city_details_many([(city, state)]).get((city, state))
+
+# One page at a time, so reruns cost the same for small and large cities
+@st.cache_data(max_entries=256)
+def load_zipcode_page(city, state, after, prefix):
+    return get_city_zipcodes_page(city, state, after=after, prefix=prefix, limit=LIST_PAGE_SIZE)
+
+@st.cache_data(max_entries=256)
+def load_zipcode_count(city, state, prefix):
+    return count_city_zipcodes(city, state, prefix)
+
+@st.cache_data(max_entries=256)
+def load_ip_page(city, state, after, prefix):
+    return get_city_ips_page(city, state, after=after, prefix=prefix, limit=LIST_PAGE_SIZE)
+
+@st.cache_data(max_entries=256)
+def load_ip_count(city, state, prefix):
+    return count_city_ips(city, state, prefix)
+
+def show_paginated_list(kind, label, city, state, load_page, load_count, total=None):
+    """
+    Filter box, one page of values as a single table, and Previous / Next buttons.
+
+    total is the unfiltered count when already known (from the city details).
+    """
+    prefix = st.text_input(f"Filter by {label} prefix", key=f"{kind}_filter")
+
+    # Keyset cursors of the pages visited so far; reset when the city or filter changes
+    view = (city, state, prefix)
+    if st.session_state.get(f"{kind}_view") != view:
+        st.session_state[f"{kind}_view"] = view
+        st.session_state[f"{kind}_cursors"] = [None]
+    cursors = st.session_state[f"{kind}_cursors"]
+
+    if prefix or total is None:
+        total = load_count(city, state, prefix)
+    if total == 0:
+        st.info(f"No {label.lower()}s found for this city.")
+        return
+
+    page = load_page(city, state, cursors[-1], prefix)
+    first = (len(cursors) - 1) * LIST_PAGE_SIZE + 1
+    st.caption(f"Showing {first}-{first + len(page['items']) - 1} of {total:,}")
+    st.dataframe({label: page['items']}, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    if col1.button("Previous", key=f"{kind}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if col2.button("Next", key=f"{kind}_next", disabled=page['next_after'] is None):
+        cursors.append(page['next_after'])
+        st.rerun()
+
+# Created once per server process and shared by every session and rerun
+@st.cache_resource
+def load_data_source():
+    return get_data_source('mounted_s3')  # Explicitly use mounted_s3 source
+
+# Keep weather warm for busy cities; one background thread per server process.
+# Opt-in: every prefetch is a billed One Call request
+@st.cache_resource
+def start_weather_prefetch():
+    if os.getenv('WEATHER_PREFETCH_ENABLED', '0') != '1':
+        return None
+    from src.weather.prefetch import get_weather_prefetcher
+    return get_weather_prefetcher()
+
+# Runs in a background thread, so it must not touch st.session_state
+def process_full_resolution(input_dir, tiff_path, lat, lon, scale, cancel_event):
+    success = combine_tiff_files(
+        input_dir=input_dir,
+        output_path=tiff_path,
+        lat=lat,
+        lon=lon,
+        elevation=scale,
+        cancel_event=cancel_event
+    )
+    check_cancelled(cancel_event)
+    if not success:
+        return None
+    from src.topography.topography_operations import load_and_downsample_tiff
+    data, trash = load_and_downsample_tiff(tiff_path)
+    return data
+
+# Render a figure in the worker pool and show the encoded image
+def show_rendered(renderer, data, params):
+    try:
+        image = get_render_pool().render(renderer, data, params)
+    except RenderQueueFull:
+        st.warning("The server is busy rendering other views. Please try again in a moment.")
+        return
+    except TimeoutError:
+        st.error("Rendering timed out")
+        return
+    if image:
+        st.image(image, use_container_width=True)
+
+# Cache terrain derivatives per region; underscored args are not hashed
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_terrain_derivatives(region_key, _data, _bounds, _input_dir):
+    try:
+        halo = load_dem_with_halo(_input_dir, _bounds, _data.shape)
+    except Exception as e:
+        print(f"Error reading DEM halo, padding edges instead: {str(e)}")
+        halo = None
+    return compute_terrain_derivatives(_data, _bounds, halo=halo)
+
+# Cache the draped satellite texture per region and 3D grid shape
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_satellite_texture(region_key, shape, _bounds):
+    from src.satellite.get_satellite import get_satellite_image
+    from src.topography.graph_types.terrain_3d import satellite_texture
+    # The texture has one colour per vertex, so a small mosaic is plenty
+    image = get_satellite_image(
+        _bounds.top,
+        _bounds.left,
+        _bounds.bottom,
+        _bounds.right,
+        pixel_budget=SATELLITE_TEXTURE_PIXEL_BUDGET
+    )
+    return satellite_texture(image, _bounds, shape)
 
 
 
@@ -146,6 +292,7 @@ col1, col2, col3 = st.columns(3)
 target_width = 400  # You can adjust this value
 target_height = 300  # Set a fixed height for all images
 # Function to resize image to fixed dimensions
+@st.cache_data
 def load_and_resize(image_path, width, height):
     img = Image.open(image_path)
     return img.resize((width, height))
@@ -167,9 +314,7 @@ with col3:
 
 
 # Initialize data source
-print("Initializing data source...")  # Debug print
-data_source = get_data_source('mounted_s3')  # Explicitly use mounted_s3 source
-print(f"Data source type: {type(data_source).__name__}")  # Debug print
+data_source = load_data_source()
 # Initialize location_data and combined_tiff_path
 location_data = None
 combined_tiff_path = None
@@ -193,6 +338,18 @@ checkbox_options = {
     'DEM Graph': st.checkbox('DEM Graph', value=True),
     'Ridge Graph': st.checkbox('Ridge Graph', value=False),
     '3D Graph': st.checkbox('3D Graph', value=False),
+    'Hillshade': st.checkbox('Hillshade', value=False),
+    'Slope': st.checkbox('Slope', value=False),
+    'Aspect': st.checkbox('Aspect', value=False),
+    'Curvature': st.checkbox('Curvature', value=False),
+}
+
+# Terrain derivative views and the product/renderer name for each
+derivative_views = {
+    'Hillshade': 'hillshade',
+    'Slope': 'slope',
+    'Aspect': 'aspect',
+    'Curvature': 'curvature',
 }
 
 # Get selected options
@@ -210,27 +367,47 @@ selected_graphs = [option for option, state in checkbox_options.items() if state
 st.write("### Select Location Method")
 input_method = st.radio(
     "Choose input method:",
-    ["City Selection", "Single Point with Scale"]
+    ["City Search", "City Selection", "Single Point with Scale"]
 )
 
 # City selection logic
-if input_method == "City Selection":
+if input_method in ("City Search", "City Selection"):
     col1, col2, col3 = st.columns(3)
+    city = state = None
     
-    with col1:
-        states = load_states()
-        state = st.selectbox("Select State", options=states, key='state_select')
-        
-    with col2:
-        if state:
-            cities = load_cities(state)
-            city = st.selectbox("Select City", options=cities, key='city_select')
+    if input_method == "City Search":
+        with col1:
+            query = st.text_input("Search City", placeholder="e.g. Denver or Springfield, IL", key='city_search')
+            
+        with col2:
+            # Only the top matches are sent to the browser, across all states
+            matches = load_city_search(query) if query.strip() else []
+            match = st.selectbox(
+                "Matching Cities",
+                options=matches,
+                format_func=lambda m: f"{m['city_name']}, {m['state_abbrev']} ({m['population_2024'] or 0:,})",
+                key='city_search_select'
+            )
+            if match:
+                city, state = match['city_name'], match['state_name']
+    else:
+        with col1:
+            states = load_states()
+            state = st.selectbox("Select State", options=states, key='state_select')
+            
+        with col2:
+            if state:
+                cities = load_cities(state)
+                city = st.selectbox("Select City", options=cities, key='city_select')
             
     with col3:
         elevation = st.number_input("Elevation (meters)", min_value=100, max_value=1000, value=500, key='elevation_input')
    
-    if st.button("Get City Data", use_container_width=True):
+    if st.button("Get City Data", use_container_width=True, disabled=not (city and state)):
         # Clear all previous data
+        if st.session_state.get('refinement_job') is not None:
+            st.session_state.refinement_job.cancel()  # Drop the stale refinement
+            st.session_state.refinement_job = None
         cleanup_old_temp_files()
         st.session_state.data = None
         st.session_state.bounds = None
@@ -263,16 +440,27 @@ if input_method == "City Selection":
 
 # Single point with scale selection
 else:
+    place = st.text_input("Find a place (optional)", placeholder="e.g. Boulder, CO or 8.8.8.8", key='point_place')
+    point_lat, point_lon = 40.73, -73.93
+    if place.strip():
+        try:
+            point_lat, point_lon = load_place_coordinates(place)
+        except Exception as e:
+            st.warning(f"Could not locate {place}: {str(e)}")
+
     col1, col2, col3 = st.columns(3)
     with col1:
-        lat = st.number_input("Latitude", value=40.73)
+        lat = st.number_input("Latitude", value=float(point_lat))
     with col2:
-        lon = st.number_input("Longitude", value=-73.93)
+        lon = st.number_input("Longitude", value=float(point_lon))
     with col3:
         elevation = st.number_input("Elevation (meters)", min_value=100, max_value=1000, value=500)
 
     if st.button("Submit Point", use_container_width=True):
         # Clear all previous data
+        if st.session_state.get('refinement_job') is not None:
+            st.session_state.refinement_job.cancel()  # Drop the stale refinement
+            st.session_state.refinement_job = None
         cleanup_old_temp_files()
         st.session_state.data = None
         st.session_state.bounds = None
@@ -315,7 +503,15 @@ else:
 if (st.session_state.location_data['location'] is not None and 
     st.session_state.location_data['city_info'] is not None):
     
-    # Get weather data
+    # Get weather data (usually already warm from the prefetcher)
+    start_weather_prefetch()
+    # Count each location once per session, not on every rerun
+    if st.session_state.location_data['location'] not in st.session_state.weather_counted:
+        st.session_state.weather_counted.add(st.session_state.location_data['location'])
+        record_weather_request(
+            st.session_state.location_data['lat'],
+            st.session_state.location_data['lon']
+        )
     weather_info = get_weather_data(
         st.session_state.location_data['lat'],
         st.session_state.location_data['lon']
@@ -339,6 +535,14 @@ if (st.session_state.location_data['location'] is not None and
             st.write(f"Population (2024): {st.session_state.location_data['city_info']['population_2024']:,}")
             st.write(f"Density: {st.session_state.location_data['city_info']['density_per_mile2']:,.0f} per sq mile")
             st.write(f"Area: {st.session_state.location_data['city_info']['area_mile2']:.2f} sq miles")
+            
+            # Precomputed terrain stats (scripts/build_elevation_stats.py); no raster reads here
+            city_info = st.session_state.location_data['city_info']
+            if city_info.get('relief_m') is not None:
+                st.write(f"Elevation: {city_info['elevation_m']:,.0f} m")
+                st.write(f"Relief within {city_info['elevation_radius_m'] / 1000:.0f} km: "
+                         f"{city_info['relief_m']:,.0f} m "
+                         f"({city_info['elevation_min_m']:,.0f}-{city_info['elevation_max_m']:,.0f} m)")
         
         with col3:
             if st.session_state.location_data['bounds']:
@@ -368,32 +572,27 @@ if (st.session_state.location_data['location'] is not None and
     
     with tab2:
         st.subheader(f"Zip Codes for {st.session_state.location_data['city_info']['city_name']}, {st.session_state.location_data['city_info']['state_name']}")
-        zipcodes = get_city_zipcodes(st.session_state.location_data['city_info']['city_name'], st.session_state.location_data['city_info']['state_name'])
-        if zipcodes:
-            # Create a grid layout for zip codes
-            cols = st.columns(5)  # Display in 5 columns
-            for idx, zipcode in enumerate(zipcodes):
-                cols[idx % 5].write(zipcode)
-        else:
-            st.info("No zip codes found for this city.")
+        show_paginated_list(
+            'zip',
+            'Zip Code',
+            st.session_state.location_data['city_info']['city_name'],
+            st.session_state.location_data['city_info']['state_name'],
+            load_zipcode_page,
+            load_zipcode_count,
+            total=st.session_state.location_data['city_info'].get('zip_count')
+        )
    
     with tab3:
         st.subheader(f"IP Addresses for {st.session_state.location_data['city_info']['city_name']}, {st.session_state.location_data['city_info']['state_name']}")
-        ip_addresses = get_city_ips(st.session_state.location_data['city_info']['city_name'], st.session_state.location_data['city_info']['state_name'])
-        if ip_addresses:
-            # Display IP addresses in a table
-            ip_df = pd.DataFrame(ip_addresses, columns=['IP Address'])
-            st.dataframe(ip_df, hide_index=True)
-        else:
-            st.info("No IP addresses found for this city.") 
-
-
-
-
-
-
-
-
+        show_paginated_list(
+            'ip',
+            'IP Address',
+            st.session_state.location_data['city_info']['city_name'],
+            st.session_state.location_data['city_info']['state_name'],
+            load_ip_page,
+            load_ip_count,
+            total=st.session_state.location_data['city_info'].get('ip_count')
+        )
 
         
 # async def waiting(task):
@@ -403,37 +602,64 @@ if (st.session_state.location_data['location'] is not None and
 # Process location data and create visualizations
 if selected_graphs and st.session_state.current_tiff_path and st.session_state.location_data['center_point']['lat']:
     if st.session_state.needs_processing:
-        try:
-            # Combine TIFF files using session state data
-            input_dir = get_base_path(data_source)
-            success = combine_tiff_files(
-                input_dir=input_dir,
-                output_path=st.session_state.current_tiff_path,
-                lat=st.session_state.location_data['center_point']['lat'],
-                lon=st.session_state.location_data['center_point']['lon'],
-                elevation=st.session_state.location_data['scale']
+        lat = st.session_state.location_data['center_point']['lat']
+        lon = st.session_state.location_data['center_point']['lon']
+        scale = st.session_state.location_data['scale']
+        tiff_path = st.session_state.current_tiff_path
+        bounds = calculate_zoom_bounds(lat, lon, scale)
+        input_dir = get_base_path(data_source)
+        
+        # Start (or keep following) the full-resolution job for this request
+        request_key = (lat, lon, scale, tiff_path)
+        job = st.session_state.get('refinement_job')
+        if job is None or job.key != request_key or job.cancelled:
+            if job is not None:
+                job.cancel()
+            job = start_refinement(
+                request_key,
+                lambda cancel_event: process_full_resolution(input_dir, tiff_path, lat, lon, scale, cancel_event)
             )
-            
-            if success:
-                # Load the data first
-                data, trash = load_and_downsample_tiff(st.session_state.current_tiff_path)
-                bounds = calculate_zoom_bounds(
-                    st.session_state.location_data['center_point']['lat'],
-                    st.session_state.location_data['center_point']['lon'],
-                    st.session_state.location_data['scale']
-                )
-                
-                # Update session state after successful load
-                st.session_state.data = data
-                st.session_state.bounds = bounds
-                st.session_state.location_data['bounds'] = bounds
-                st.session_state.needs_processing = False
-            else:
-                st.error("Failed to combine TIFF files")
-                st.stop()
+            st.session_state.refinement_job = job
+        
+        # Show a coarse preview first if it can be read within the latency budget
+        preview_container = st.empty()
+        if not job.done():
+            preview = run_with_budget(lambda: load_preview(input_dir, bounds))
+            if preview is not None and not job.done():
+                import matplotlib.pyplot as plt
+                from src.topography.graph_types.dem_plots import create_dem_plot
+                with preview_container.container():
+                    st.caption("Preview - refining to full resolution...")
+                    fig_preview = create_dem_plot(preview, bounds)
+                    if fig_preview:
+                        st.pyplot(fig_preview)
+                        plt.close(fig_preview)
+        
+        # Poll rather than block so a new request can interrupt this run
+        status = st.empty()
+        started = time.time()
+        while not job.wait(0.25):
+            status.caption(f"Refining... {time.time() - started:.1f}s")
+        status.empty()
+        preview_container.empty()
+        
+        try:
+            data = job.result()
         except Exception as e:
+            st.session_state.refinement_job = None
             st.error(f"Error processing data: {str(e)}")
             st.stop()
+        
+        st.session_state.refinement_job = None
+        if data is None:
+            st.error("Failed to combine TIFF files")
+            st.stop()
+        
+        # Update session state after successful load
+        st.session_state.data = data
+        st.session_state.bounds = bounds
+        st.session_state.location_data['bounds'] = bounds
+        st.session_state.needs_processing = False
     
     # Create columns based on number of selected graphs
     num_cols = min(1, len(selected_graphs))
@@ -447,6 +673,9 @@ if selected_graphs and st.session_state.current_tiff_path and st.session_state.l
                 
                 if graph_type == 'Street View':
                     try:
+                        from src.map_utils.map_operations import create_map, get_map_parameters
+                        from streamlit_folium import st_folium
+                        
                         lat = st.session_state.location_data['center_point']['lat']
                         lon = st.session_state.location_data['center_point']['lon']
                         
@@ -459,10 +688,19 @@ if selected_graphs and st.session_state.current_tiff_path and st.session_state.l
                                 city_info=st.session_state.location_data.get('city_info')
                             )
                             
+                            # DEM overlays are served as XYZ tiles so only visible tiles get rendered
+                            try:
+                                tile_layers = get_tile_server(get_base_path(data_source)).layer_urls()
+                            except Exception as e:
+                                print(f"DEM tile server unavailable: {str(e)}")
+                                st.warning(f"DEM map overlays are unavailable: {str(e)}")
+                                tile_layers = None
+                            
                             st.session_state.location_data['map_object'] = create_map(
                                 lat=lat,
                                 lon=lon,
-                                zoom=map_params['zoom']
+                                zoom=map_params['zoom'],
+                                tile_layers=tile_layers
                             )
                         
                         # Display the map
@@ -482,10 +720,12 @@ if selected_graphs and st.session_state.current_tiff_path and st.session_state.l
                         'lat': st.session_state.location_data['center_point']['lat'],
                         'lon': st.session_state.location_data['center_point']['lon']
                     }
-                    fig_dem = create_dem_plot(st.session_state.data, st.session_state.bounds, coordinates)
-                    if fig_dem:
-                        st.pyplot(fig_dem)
-                        plt.close(fig_dem)
+                    # Label cities inside the DEM bounds (R*Tree lookup, most populous first)
+                    labels = [
+                        (city['city_name'], city['latitude'], city['longitude'])
+                        for city in cities_in_bounds(st.session_state.bounds)
+                    ]
+                    show_rendered('dem', st.session_state.data, bounds_params(st.session_state.bounds, title=coordinates, labels=labels))
                 
                 elif graph_type == 'Ridge Graph':
                     coordinates = {
@@ -493,49 +733,86 @@ if selected_graphs and st.session_state.current_tiff_path and st.session_state.l
                         'lon': st.session_state.location_data['center_point']['lon']
                     }
                     title = f"{coordinates['lat']},\n{coordinates['lon']}"
-                    fig_ridge = create_ridge_plot_optimized(st.session_state.data, title=title)
-                    if fig_ridge:
-                        st.pyplot(fig_ridge)
-                        plt.close(fig_ridge)
+                    show_rendered('ridge', st.session_state.data, {'title': title})
                 
                 elif graph_type == '3D Graph':
+                    from src.topography.graph_types.terrain_3d import create_3d_plot, downsample_for_3d
                     plot_data = downsample_for_3d(st.session_state.data)
-                    fig_3d = create_3d_plot(plot_data, st.session_state.bounds)
+                    texture = None
+                    if st.checkbox("Drape satellite imagery", key="drape_satellite"):
+                        region_key = (
+                            st.session_state.location_data['center_point']['lat'],
+                            st.session_state.location_data['center_point']['lon'],
+                            st.session_state.location_data['scale']
+                        )
+                        with st.spinner("Loading satellite texture..."):
+                            try:
+                                texture = load_satellite_texture(region_key, plot_data.shape, st.session_state.bounds)
+                            except Exception as e:
+                                st.warning(f"Satellite imagery unavailable: {str(e)}")
+                    fig_3d = create_3d_plot(plot_data, st.session_state.bounds, texture=texture)
                     if fig_3d:
                         st.plotly_chart(fig_3d)
                 
+                elif graph_type in derivative_views:
+                    product = derivative_views[graph_type]
+                    region_key = (
+                        st.session_state.location_data['center_point']['lat'],
+                        st.session_state.location_data['center_point']['lon'],
+                        st.session_state.location_data['scale'],
+                        st.session_state.data.shape
+                    )
+                    derivatives = load_terrain_derivatives(
+                        region_key,
+                        st.session_state.data,
+                        st.session_state.bounds,
+                        str(get_base_path(data_source))
+                    )
+                    show_rendered(product, derivatives[product], bounds_params(st.session_state.bounds))
+                
                 elif graph_type == 'Satellite View':
                     try:
+                        from src.satellite.get_satellite import iter_satellite_image, downscale_for_display
+                        
                         bounds = st.session_state.location_data['bounds']
                         
                         # Add a button to fetch satellite imagery
                         if st.button("Fetch Satellite Image", key="fetch_satellite"):
                             with st.spinner("Fetching satellite imagery..."):
-                                # Create progress bar container
+                                # Create progress bar and preview containers
                                 progress_container = st.empty()
                                 progress_bar = progress_container.progress(0, text="Downloading satellite imagery...")
+                                preview_container = st.empty()
                                 
-                                def update_progress(progress):
-                                    progress_bar.progress(progress, text=f"Downloading tiles... {int(progress * 100)}%")
-                                
-                                # Get the satellite image
-                                image = get_satellite_image(
+                                # Stream the mosaic and repaint a small preview every few tiles
+                                image = None
+                                last_paint = 0.0
+                                for update in iter_satellite_image(
                                     bounds.top,
                                     bounds.left,
                                     bounds.bottom,
-                                    bounds.right,
-                                    zoom=12 if st.session_state.location_data['scale'] >= 500 else 14,
-                                    progress_callback=update_progress
-                                )
+                                    bounds.right
+                                ):
+                                    image = update.image
+                                    progress = update.done / update.total
+                                    progress_bar.progress(progress, text=f"Downloading tiles... {int(progress * 100)}%")
+                                    
+                                    now = time.time()
+                                    if (update.done % SATELLITE_REPAINT_TILES == 0
+                                            or now - last_paint >= SATELLITE_REPAINT_SECONDS):
+                                        preview_container.image(
+                                            downscale_for_display(image, SATELLITE_PREVIEW_WIDTH),
+                                            output_format='JPEG'
+                                        )
+                                        last_paint = now
                                 
                                 progress_container.empty()
+                                preview_container.empty()
                                 
                                 if image is not None and image.size > 0:
-                                    # Convert BGR to RGB for display
-                                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                                    
-                                    # Store the image in session state
-                                    st.session_state.satellite_image = image_rgb
+                                    # The mosaic is already RGB; keep only a display-sized copy
+                                    st.session_state.satellite_image = downscale_for_display(image)
+                                    del image
                                     
                                     # Show coordinates
                                     st.session_state.satellite_coords = {
@@ -549,7 +826,7 @@ if selected_graphs and st.session_state.current_tiff_path and st.session_state.l
                         
                         # Display the image if it exists in session state
                         if 'satellite_image' in st.session_state:
-                            st.image(st.session_state.satellite_image, use_container_width=True)
+                            st.image(st.session_state.satellite_image, use_container_width=True, output_format='JPEG')
                             
                             # Show coordinates if they exist
                             if 'satellite_coords' in st.session_state:
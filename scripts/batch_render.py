@@ -0,0 +1,255 @@
+"""
+Headless batch renderer for gallery images.
+
+Examples:
+    python scripts/batch_render.py --state Colorado --scales 500 1000 --renderers dem hillshade
+    python scripts/batch_render.py --state Texas --cities Austin "San Antonio" --output-dir gallery
+    python scripts/batch_render.py --points-csv points.csv --renderers dem ridge slope
+
+The points CSV needs lat and lon columns and may have a name column.
+Finished jobs are skipped on the next run, so an interrupted batch can be
+resumed by running the same command again. Renderers that produced nothing are
+listed as failed_renderers in the job metadata and are not retried; delete
+the job directory to try again.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_sources.file_parseing import calculate_zoom_bounds, get_required_file_names
+from src.topography.render_pool import RENDERERS, bounds_params
+from src.topography.terrain_derivatives import DERIVATIVE_PRODUCTS
+
+METADATA_FILE = 'metadata.json'
+
+
+def slugify(text):
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower()
+
+
+def load_city_jobs(state, cities=None):
+    """Build job entries for cities in a state (all cities when none are given)"""
+    from src.database.db_utils import get_cities_in_state, get_city_details_many
+
+    cities = cities or get_cities_in_state(state)
+    details = get_city_details_many((city, state) for city in cities)  # One query for every city
+
+    points = []
+    for city in cities:
+        info = details.get((city, state))
+        if not info or info['latitude'] is None or info['longitude'] is None:
+            print(f"Skipping {city}, {state}: no coordinates")
+            continue
+        points.append({
+            'name': f"{city}, {state}",
+            'lat': info['latitude'],
+            'lon': info['longitude']
+        })
+    return points
+
+
+def load_csv_jobs(csv_path):
+    """Build job entries from a CSV with lat, lon and optional name columns"""
+    points = []
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            lat, lon = float(row['lat']), float(row['lon'])
+            points.append({
+                'name': row.get('name') or f"{lat:.4f}_{lon:.4f}",
+                'lat': lat,
+                'lon': lon
+            })
+    return points
+
+
+def plan_jobs(points, scales):
+    """
+    Expand points by scale and order them by the DEM tiles they read.
+
+    Jobs that share tiles run next to each other so the tile reads stay
+    warm in the OS page cache (or s3fs cache) across jobs.
+    """
+    jobs = []
+    for point in points:
+        for scale in scales:
+            bounds = calculate_zoom_bounds(point['lat'], point['lon'], scale)
+            tiles = tuple(sorted(get_required_file_names(bounds)))
+            jobs.append({
+                **point,
+                'scale': scale,
+                'job_id': f"{slugify(point['name'])}_{scale}",
+                'tiles': tiles
+            })
+    jobs.sort(key=lambda job: (job['tiles'], job['scale']))
+    return jobs
+
+
+def is_complete(job_dir, renderers):
+    """
+    A job is complete when its metadata exists and every requested renderer
+    either wrote its image or is recorded as failed (rendered nothing), so
+    renders that cannot succeed are not retried on every resumed run
+    """
+    metadata_path = job_dir / METADATA_FILE
+    if not metadata_path.exists():
+        return False
+    try:
+        failed = set(json.loads(metadata_path.read_text()).get('failed_renderers', []))
+    except ValueError:
+        return False
+    return all(
+        (job_dir / f"{renderer}.png").exists() or renderer in failed
+        for renderer in renderers
+    )
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def run_job(job, input_dir, renderers, output_dir):
+    """
+    Build the mosaic for one job and write every requested render.
+
+    Runs in a worker process. Metadata is written last (atomically), so a
+    job interrupted mid-way is redone on the next run.
+    """
+    from src.data_sources.file_parseing import combine_tiff_files
+    from src.topography.render_pool import render_to_bytes
+    from src.topography.terrain_derivatives import compute_terrain_derivatives, load_dem_with_halo
+    from src.topography.topography_operations import load_and_downsample_tiff
+    import numpy as np
+
+    started = time.time()
+    job_dir = Path(output_dir) / job['job_id']
+    job_dir.mkdir(parents=True, exist_ok=True)
+    tiff_path = os.path.join(tempfile.gettempdir(), f"batch_{job['job_id']}_{os.getpid()}.tif")
+
+    try:
+        if not combine_tiff_files(input_dir, tiff_path, job['lat'], job['lon'], job['scale']):
+            return job, None
+        data, _ = load_and_downsample_tiff(tiff_path)
+    finally:
+        if os.path.exists(tiff_path):
+            os.remove(tiff_path)
+    mosaic_seconds = time.time() - started
+
+    bounds = calculate_zoom_bounds(job['lat'], job['lon'], job['scale'])
+    derivatives = {}
+    products = [r for r in renderers if r in DERIVATIVE_PRODUCTS]
+    if products:
+        halo = load_dem_with_halo(input_dir, bounds, data.shape)
+        derivatives = compute_terrain_derivatives(data, bounds, products=products, halo=halo)
+
+    failed_renderers = []
+    for renderer in renderers:
+        values = derivatives.get(renderer, data)
+        title = job['name'] if renderer != 'ridge' else f"{job['lat']},\n{job['lon']}"
+        try:
+            image = render_to_bytes(renderer, values, bounds_params(bounds, title=title))
+        except Exception as e:
+            print(f"Job {job['job_id']} renderer {renderer} failed: {str(e)}")
+            image = None
+        if image:
+            (job_dir / f"{renderer}.png").write_bytes(image)
+        else:
+            failed_renderers.append(renderer)
+
+    metadata = {
+        'name': job['name'],
+        'lat': job['lat'],
+        'lon': job['lon'],
+        'scale': job['scale'],
+        'bounds': bounds_params(bounds)['bounds'],
+        'shape': list(data.shape),
+        'elevation_min': float(np.nanmin(data)),
+        'elevation_max': float(np.nanmax(data)),
+        'tiles': list(job['tiles']),
+        'renderers': renderers,
+        'failed_renderers': failed_renderers,
+        'mosaic_seconds': round(mosaic_seconds, 3),
+        'total_seconds': round(time.time() - started, 3)
+    }
+    temp_metadata = job_dir / f"{METADATA_FILE}.tmp"
+    temp_metadata.write_text(json.dumps(metadata, indent=2))
+    os.replace(temp_metadata, job_dir / METADATA_FILE)
+    return job, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render gallery images for many locations without the UI")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--state', help="State name; renders every city unless --cities is given")
+    source.add_argument('--points-csv', help="CSV with lat, lon and optional name columns")
+    parser.add_argument('--cities', nargs='+', help="Cities within --state to render")
+    parser.add_argument('--scales', nargs='+', type=int, default=[500], help="Elevation scales in meters")
+    parser.add_argument('--renderers', nargs='+', default=['dem'], choices=sorted(RENDERERS))
+    parser.add_argument('--output-dir', default='gallery')
+    parser.add_argument('--input-dir', help="DEM tile directory (defaults to the configured data source)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.cities and not args.state:
+        parser.error("--cities requires --state")
+
+    if args.input_dir:
+        input_dir = Path(args.input_dir).expanduser()
+    else:
+        from src.config.data_source_config import get_base_path, get_data_source
+        input_dir = get_base_path(get_data_source())
+
+    points = load_city_jobs(args.state, args.cities) if args.state else load_csv_jobs(args.points_csv)
+    jobs = plan_jobs(points, args.scales)
+    output_dir = Path(args.output_dir)
+
+    pending = [job for job in jobs if not is_complete(output_dir / job['job_id'], args.renderers)]
+    print(f"{len(jobs)} jobs planned, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+    if not pending:
+        return
+
+    started = time.time()
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as executor:
+        # Submitted in tile order; workers pick them up in that order
+        futures = {
+            executor.submit(run_job, job, str(input_dir), args.renderers, str(output_dir)): job
+            for job in pending
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                _, metadata = future.result()
+            except Exception as e:
+                metadata = None
+                print(f"Job {job['job_id']} failed: {str(e)}")
+            done += 1
+            # A job whose renderers produced nothing is recorded but still failed
+            if metadata is None or metadata['failed_renderers']:
+                failed += 1
+            elapsed = time.time() - started
+            rate = done / elapsed if elapsed else 0.0
+            eta = (len(pending) - done) / rate if rate else 0.0
+            if metadata is None:
+                status = 'FAILED'
+            elif metadata['failed_renderers']:
+                status = f"FAILED ({', '.join(metadata['failed_renderers'])} rendered nothing)"
+            else:
+                status = 'ok'
+            print(f"[{done}/{len(pending)}] {job['job_id']} {status} | {rate:.2f} jobs/s | "
+                  f"{rate * len(args.renderers):.2f} images/s | ETA {eta:.0f}s")
+
+    print(f"Finished {done - failed} jobs ({failed} failed) in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
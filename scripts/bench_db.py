@@ -0,0 +1,77 @@
+"""
+Per-call latency of the db_utils queries.
+
+Runs every query the Graphing page makes with a fresh connection per call
+(the previous behaviour) and through the thread-local read-only connection
+in each DB_MODE (file, mmap, memory), and reports median and p95 latency:
+
+    python scripts/bench_db.py --iterations 2000
+    python scripts/bench_db.py --modes mmap memory
+"""
+import argparse
+import json
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database import db_utils
+
+
+def fresh_connection_call(sql, params):
+    """One query on a new connection, as db_utils used to do"""
+    conn = sqlite3.connect(db_utils.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def pooled_call(sql, params):
+    return db_utils.get_read_connection().execute(sql, params).fetchall()
+
+
+def measure(fn, sql, params, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(sql, params)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark db_utils per-call latency")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--city', default='Denver')
+    parser.add_argument('--state', default='Colorado')
+    parser.add_argument('--modes', nargs='+', default=list(db_utils.DB_MODES), choices=db_utils.DB_MODES)
+    args = parser.parse_args()
+
+    city_args = (args.city, args.state)
+    queries = [
+        ('states', db_utils.ALL_STATES_SQL, ()),
+        ('cities_in_state', db_utils.CITIES_IN_STATE_SQL, (args.state,)),
+        ('city_details', db_utils.CITY_DETAILS_SQL, (json.dumps([city_args]),)),
+        ('city_zipcodes', db_utils.CITY_ZIPCODES_SQL, city_args),
+        ('city_ips', db_utils.CITY_IPS_SQL, city_args),
+        ('city_search', db_utils.CITY_SEARCH_SQL, ('"den"*', 10)),
+    ]
+
+    columns = ['fresh'] + args.modes
+    print(f"{'query':<18}" + ''.join(f"{name + ' median':>16}{'p95':>10}" for name in columns))
+    for name, sql, params in queries:
+        results = [measure(fresh_connection_call, sql, params, args.iterations)]
+        for mode in args.modes:
+            db_utils.set_db_mode(mode)
+            pooled_call(sql, params)  # Open the connection (and load a snapshot) outside the timing
+            results.append(measure(pooled_call, sql, params, args.iterations))
+        print(f"{name:<18}" + ''.join(f"{median:13.1f} us{p95:7.1f} us" for median, p95 in results))
+
+
+if __name__ == "__main__":
+    main()
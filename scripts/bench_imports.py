@@ -0,0 +1,105 @@
+"""
+Import-time benchmark for the Graphing page.
+
+Collects the module-level imports of pages/01_Graphing.py (imports inside
+functions and visualization branches are lazy and not counted), imports them
+in a fresh interpreter with ``python -X importtime`` and reports the cost on
+top of streamlit itself, which the server has already loaded.
+
+Exits with status 1 when the median total exceeds the budget, so it can be
+used as a startup regression check:
+
+    python scripts/bench_imports.py --budget-ms 1000
+    python scripts/bench_imports.py --module src.satellite.get_satellite
+"""
+import argparse
+import ast
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGE = ROOT / 'pages' / '01_Graphing.py'
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+
+def eager_imports(path):
+    """Import statements at module level of a script, as source lines"""
+    tree = ast.parse(path.read_text())
+    lines = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            lines.extend(f"import {alias.name}" for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = ', '.join(alias.name for alias in node.names)
+            lines.append(f"from {node.module} import {names}")
+    return [line for line in lines if line != 'import streamlit']
+
+
+def measure(import_lines):
+    """
+    Run the imports once in a fresh interpreter.
+
+    Returns:
+        Tuple of (total ms, {top-level package: cumulative ms})
+    """
+    code = '; '.join(['import streamlit'] + import_lines)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    packages = {}
+    after_streamlit = False
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match[2]), len(match[3]), match[4]
+        if indent != 1:
+            continue
+        if after_streamlit:
+            packages[name] = cumulative_us / 1000
+        elif name == 'streamlit':
+            after_streamlit = True
+
+    return sum(packages.values()), packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Graphing page import time")
+    parser.add_argument('--module', action='append', help="Measure these modules instead of the page imports")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1000.0)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    import_lines = [f"import {m}" for m in args.module] if args.module else eager_imports(PAGE)
+    print("Measuring:")
+    for line in import_lines:
+        print(f"  {line}")
+
+    totals, last_packages = [], {}
+    for _ in range(args.runs):
+        total, last_packages = measure(import_lines)
+        totals.append(total)
+
+    median = statistics.median(totals)
+    print("\nSlowest top-level imports (last run):")
+    for name, ms in sorted(last_packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print(f"\nImport time over {args.runs} runs: median {median:.1f} ms, "
+          f"min {min(totals):.1f} ms, max {max(totals):.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if median > args.budget_ms:
+        print("FAIL: import time is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+IP -> city lookup benchmark.
+
+Times single lookups through the in-memory sorted index (bisect) against a
+SQL query per address, and batch IPv4 lookups with np.searchsorted, over a
+mix of known addresses, same-/24 neighbours and random addresses:
+
+    python scripts/bench_ip_lookup.py --lookups 200000 --batch 5000000
+"""
+import argparse
+import ipaddress
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from src.database.db_utils import get_read_connection, ip_key
+from src.database.ip_index import IpCityIndex
+
+SQL_LOOKUP = "SELECT city_id FROM ip_addresses WHERE ip_address = ? LIMIT 1"
+
+
+def sample_addresses(index, n, rng):
+    """One third known, one third in a known /24, one third random"""
+    known = index.ipv4_keys.astype(np.int64)
+    picks = known[rng.integers(0, len(known), n)]
+    kind = rng.integers(0, 3, n)
+    neighbours = (picks & ~0xFF) | rng.integers(0, 256, n)
+    random = rng.integers(0, 2 ** 32, n)
+    return np.where(kind == 0, picks, np.where(kind == 1, neighbours, random)).astype(np.uint32)
+
+
+def rate(count, seconds):
+    return f"{count / seconds / 1e6:8.2f} M lookups/s ({seconds / count * 1e6:7.3f} us each)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IP to city lookups")
+    parser.add_argument('--lookups', type=int, default=200_000, help="Single lookups to time")
+    parser.add_argument('--batch', type=int, default=5_000_000, help="Addresses in the vectorized batch")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = IpCityIndex.from_db()
+    print(f"Index: {len(index)} addresses, built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    addresses = sample_addresses(index, args.lookups, rng)
+    texts = [str(ipaddress.IPv4Address(int(a))) for a in addresses]
+
+    conn = get_read_connection()
+    sql_count = min(len(texts), 50_000)
+    started = time.perf_counter()
+    for text in texts[:sql_count]:
+        conn.execute(SQL_LOOKUP, (text,)).fetchone()
+    print(f"SQL exact match per address:  {rate(sql_count, time.perf_counter() - started)}")
+
+    started = time.perf_counter()
+    hits = sum(index.lookup(text) is not None for text in texts)
+    print(f"city_for_ip (bisect):         {rate(len(texts), time.perf_counter() - started)} | {hits / len(texts):.0%} matched")
+
+    batch = sample_addresses(index, args.batch, rng)
+    started = time.perf_counter()
+    rows = index.lookup_ipv4_batch(batch)
+    print(f"Batch IPv4 (np.searchsorted): {rate(len(batch), time.perf_counter() - started)} | {np.mean(rows >= 0):.0%} matched")
+
+    # The batch and scalar paths must agree, including on addresses exactly
+    # halfway between two known addresses in the same /24
+    known = index.ipv4_keys.astype(np.int64)
+    same_net = np.flatnonzero((known[1:] >> 8 == known[:-1] >> 8) & ((known[1:] - known[:-1]) % 2 == 0)
+                              & (known[1:] - known[:-1] > 1))
+    ties = ((known[same_net] + known[same_net + 1]) // 2)[:500].astype(np.uint32)
+    print(f"Tie cases (equidistant neighbours): {len(ties)}")
+    check = np.concatenate([batch[:2000], ties])
+    expected = [index.lookup(str(ipaddress.IPv4Address(int(a)))) for a in check]
+    got = index.lookup_ipv4_batch(check)
+    mismatches = sum(
+        (e is None) != (g < 0) or (e is not None and e['city_id'] != index.cities[g]['city_id'])
+        for e, g in zip(expected, got)
+    )
+    print(f"Scalar/batch agreement on {len(check)} addresses: {len(check) - mismatches}/{len(check)}")
+
+    # A known tie: 10.0.0.15 is 5 away from both neighbours, the lower one wins
+    tie_index = IpCityIndex([(ip_key('10.0.0.10'), {'city_id': 1}), (ip_key('10.0.0.20'), {'city_id': 2})])
+    scalar = tie_index.lookup('10.0.0.15')['city_id']
+    vector = tie_index.cities[tie_index.lookup_ipv4_batch([int(ipaddress.IPv4Address('10.0.0.15'))])[0]]['city_id']
+    print(f"Tie 10.0.0.15 between .10 and .20: scalar -> city {scalar}, batch -> city {vector}")
+    if mismatches or scalar != vector or scalar != 1:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
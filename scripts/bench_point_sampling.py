@@ -0,0 +1,86 @@
+"""
+Point elevation sampling benchmark.
+
+Times sample_elevations (points bucketed by tile and block, vectorized
+indexing) against rasterio's per-point sample() on random points inside a
+bounding box, and checks that nearest sampling agrees with it:
+
+    python scripts/bench_point_sampling.py --bounds -105.5 39.5 -104.5 40.5 --points 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from src.topography.elevation_stats import tile_name
+from src.topography.point_sampling import sample_elevations
+
+
+def rate(count, seconds):
+    return f"{count / seconds / 1e6:8.2f} M points/s ({seconds / count * 1e6:7.3f} us each)"
+
+
+def rasterio_sample(input_dir, lats, lons):
+    """Reference: one rasterio sample() call per tile, point by point"""
+    import rasterio
+
+    values = np.full(lats.shape, np.nan, dtype=np.float32)
+    names = np.array([tile_name(lat, lon) for lat, lon in zip(lats, lons)])
+    for name in np.unique(names):
+        path = Path(input_dir) / name
+        if not path.exists():
+            continue
+        idx = np.flatnonzero(names == name)
+        with rasterio.open(path) as src:
+            samples = np.array([v[0] for v in src.sample(zip(lons[idx], lats[idx]))], dtype=np.float32)
+            if src.nodata is not None:
+                samples[samples == src.nodata] = np.nan
+        values[idx] = samples
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched point elevation sampling")
+    parser.add_argument('--input-dir', help="DEM tile directory (defaults to the configured data source)")
+    parser.add_argument('--bounds', type=float, nargs=4, metavar=('LEFT', 'BOTTOM', 'RIGHT', 'TOP'),
+                        default=[-105.5, 39.5, -104.5, 40.5])
+    parser.add_argument('--points', type=int, default=1_000_000, help="Points in the batch")
+    parser.add_argument('--reference', type=int, default=20_000, help="Points timed with rasterio sample()")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.input_dir:
+        input_dir = Path(args.input_dir).expanduser()
+    else:
+        from src.config.data_source_config import get_base_path, get_data_source
+        input_dir = get_base_path(get_data_source())
+
+    left, bottom, right, top = args.bounds
+    rng = np.random.default_rng(args.seed)
+    lats = rng.uniform(bottom, top, args.points)
+    lons = rng.uniform(left, right, args.points)
+
+    for method in ('nearest', 'bilinear'):
+        started = time.perf_counter()
+        values = sample_elevations(lats, lons, method=method, input_dir=input_dir)
+        print(f"sample_elevations ({method:8}): {rate(len(lats), time.perf_counter() - started)} "
+              f"| {np.isfinite(values).mean():.0%} with data")
+
+    n = min(args.reference, args.points)
+    started = time.perf_counter()
+    expected = rasterio_sample(input_dir, lats[:n], lons[:n])
+    print(f"rasterio sample() per point:  {rate(n, time.perf_counter() - started)}")
+
+    got = sample_elevations(lats[:n], lons[:n], method='nearest', input_dir=input_dir)
+    agree = np.sum((got == expected) | (np.isnan(got) & np.isnan(expected)))
+    print(f"Nearest/rasterio agreement on {n} points: {agree}/{n}")
+    if agree != n:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Satellite mosaic benchmark against a local stand-in tile server.
+
+Serves a synthetic 256px JPEG tile with injected latency and times
+get_satellite_image serially (one worker), concurrently, and against a cold
+and then warm persistent tile cache. Peak traced memory is reported for the
+display path (mosaic + downscale) against the previous full-size BGR->RGB
+conversion:
+
+    python scripts/bench_satellite.py --latency-ms 50 --workers 8
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cv2
+import numpy as np
+
+from src.satellite.get_satellite import downscale_for_display, get_satellite_image, get_tile_grid
+from src.satellite.tile_cache import TileCache
+from stub_servers import StubServer, make_tile_handler
+
+
+def synthetic_tile(tile_size=256, seed=0):
+    """JPEG tile with a gradient and some noise, similar in size to a real one"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, tile_size, dtype=np.float32)
+    tile = np.stack([
+        np.tile(gradient, (tile_size, 1)),
+        np.tile(gradient[:, None], (1, tile_size)),
+        rng.uniform(0, 255, (tile_size, tile_size))
+    ], axis=-1).astype(np.uint8)
+    return cv2.imencode('.jpg', tile)[1].tobytes()
+
+
+def run(url, bounds, zoom, workers, cache=False):
+    started = time.perf_counter()
+    image = get_satellite_image(*bounds, zoom=zoom, max_workers=workers, url=url, layer='bench', cache=cache)
+    return time.perf_counter() - started, image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark satellite tile download and stitching")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Latency added to every tile response")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--display-width', type=int, default=1600)
+    parser.add_argument('--zoom', type=int, default=14)
+    parser.add_argument('--bounds', type=float, nargs=4, default=[40.80, -74.05, 40.68, -73.85],
+                        metavar=('LAT1', 'LON1', 'LAT2', 'LON2'))
+    args = parser.parse_args()
+
+    lat1, lon1, lat2, lon2 = args.bounds
+    grid = get_tile_grid(min(lat1, lat2), max(lat1, lat2), min(lon1, lon2), max(lon1, lon2), args.zoom)
+    total_tiles = (grid['br_tile_x'] - grid['tl_tile_x'] + 1) * (grid['br_tile_y'] - grid['tl_tile_y'] + 1)
+    print(f"{total_tiles} tiles at zoom {args.zoom}, {args.latency_ms:.0f} ms latency per tile")
+
+    handler = make_tile_handler(synthetic_tile(), latency_seconds=args.latency_ms / 1000)
+    with StubServer(handler) as server:
+        url = server.url + '/vt?x={x}&y={y}&z={z}'
+        for workers in (1, args.workers):
+            elapsed, image = run(url, args.bounds, args.zoom, workers)
+            print(f"workers={workers:3d}: {elapsed:7.2f} s  {total_tiles / elapsed:8.1f} tiles/s  "
+                  f"mosaic {image.shape[1]}x{image.shape[0]}")
+
+        for label, legacy in (('full-size cvtColor', True), ('display downscale', False)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            image = get_satellite_image(*args.bounds, zoom=args.zoom, max_workers=args.workers,
+                                        url=url, layer='bench', cache=False)
+            if legacy:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            shown = downscale_for_display(image, args.display_width)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:>18}: {elapsed:7.2f} s  peak {peak / 1e6:8.1f} MB  shown {shown.shape[1]}x{shown.shape[0]}")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = TileCache(Path(cache_dir) / 'bench.mbtiles')
+            for label in ('cold cache', 'warm cache'):
+                requests_before = server.request_count
+                elapsed, image = run(url, args.bounds, args.zoom, args.workers, cache=cache)
+                print(f"{label:>11}: {elapsed:7.2f} s  {total_tiles / elapsed:8.1f} tiles/s  "
+                      f"{server.request_count - requests_before} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Weather client benchmark against a local stand-in One Call server.
+
+Compares the previous uncached ``requests.get`` per call with WeatherClient
+for page reruns at nearby points (cold then warm), and a burst of concurrent
+identical requests that should collapse into one upstream call:
+
+    python scripts/bench_weather.py --latency-ms 200 --reruns 20 --concurrent 16
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from src.weather.weather_client import WeatherClient, parse_weather
+from stub_servers import StubServer, make_weather_handler
+
+
+def legacy_get(url, lat, lon):
+    response = requests.get(f"{url}?lat={lat}&lon={lon}&units=imperial&appid=bench")
+    response.raise_for_status()
+    return parse_weather(response.json())
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def report(label, samples, upstream):
+    print(f"{label:<28} median {statistics.median(samples):8.1f} ms | "
+          f"max {max(samples):8.1f} ms | upstream requests {upstream}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cached weather client")
+    parser.add_argument('--latency-ms', type=float, default=200.0, help="Latency added to every response")
+    parser.add_argument('--reruns', type=int, default=20, help="Page reruns to simulate")
+    parser.add_argument('--concurrent', type=int, default=16, help="Simultaneous identical requests")
+    args = parser.parse_args()
+
+    # Reruns jitter around one city, as map clicks and reloads do
+    points = [(39.7392 + 0.001 * (i % 5), -104.9903 - 0.001 * (i % 3)) for i in range(args.reruns)]
+
+    with StubServer(make_weather_handler(args.latency_ms / 1000)) as server:
+        samples = [timed(legacy_get, server.url, lat, lon) for lat, lon in points]
+        report("uncached requests.get", samples, server.request_count)
+
+        before = server.request_count
+        client = WeatherClient(base_url=server.url, api_key='bench')
+        samples = [timed(client.get, lat, lon) for lat, lon in points]
+        report("client (cold, then warm)", samples, server.request_count - before)
+
+        before = server.request_count
+        client = WeatherClient(base_url=server.url, api_key='bench')
+        with ThreadPoolExecutor(max_workers=args.concurrent) as executor:
+            samples = list(executor.map(lambda _: timed(client.get, *points[0]), range(args.concurrent)))
+        report(f"client ({args.concurrent} concurrent)", samples, server.request_count - before)
+
+        before = server.request_count
+        client = WeatherClient(base_url=server.url, api_key='bench', ttl_seconds=0)
+        client.get(*points[0])
+        samples = [timed(client.get, *points[0]) for _ in range(args.reruns)]
+        time.sleep(args.latency_ms / 1000 * 2)
+        report("client (stale, revalidating)", samples, server.request_count - before)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Precompute terrain statistics around every city into city_elevation_stats.
+
+Cities are grouped so that every DEM tile their discs touch belongs to one
+group (cities near a tile edge pull the neighbouring tiles into their
+group), and each group is handled by one worker, so every tile is read by a
+single worker. Discs are sampled with sample_elevations, which reads only the
+tile blocks the sample points fall in:
+
+    python scripts/build_elevation_stats.py
+    python scripts/build_elevation_stats.py --radius-m 5000 --spacing-m 60 --workers 8 --input-dir ~/dem_tiles
+
+Rerun after adding cities or changing the radius; rows are replaced.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.db_utils import CITY_COORDINATES_BY_ID_SQL, DB_PATH, get_db_connection
+from src.database.migrations import migrate
+from src.topography.elevation_stats import (
+    DEFAULT_RADIUS_M, SAMPLE_SPACING_M, compute_city_elevation_stats, group_by_tiles
+)
+
+INSERT_SQL = """
+    INSERT OR REPLACE INTO city_elevation_stats
+        (city_id, radius_m, elevation_m, min_m, max_m, mean_m, relief_m, sample_count, computed_at)
+    VALUES
+        (:city_id, :radius_m, :elevation_m, :min_m, :max_m, :mean_m, :relief_m, :sample_count, :computed_at)
+"""
+
+
+def run_group(input_dir, cities, radius_m, spacing_m):
+    """Compute stats for the cities of one tile (runs in a worker process)"""
+    return list(compute_city_elevation_stats(input_dir, cities, radius_m, spacing_m))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-city elevation statistics")
+    parser.add_argument('--input-dir', help="DEM tile directory (defaults to the configured data source)")
+    parser.add_argument('--radius-m', type=float, default=DEFAULT_RADIUS_M, help="Radius summarised around each city")
+    parser.add_argument('--spacing-m', type=float, default=SAMPLE_SPACING_M, help="Distance between sample points")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.input_dir:
+        input_dir = Path(args.input_dir).expanduser()
+    else:
+        from src.config.data_source_config import get_base_path, get_data_source
+        input_dir = get_base_path(get_data_source())
+
+    migrate(DB_PATH)
+    conn = get_db_connection()
+    cities = [dict(row) for row in conn.execute(CITY_COORDINATES_BY_ID_SQL)]
+    groups = group_by_tiles(cities, args.radius_m)
+    print(f"{len(cities)} cities in {len(groups)} tile groups, radius {args.radius_m:.0f} m")
+
+    started = time.time()
+    computed_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    written = failed_groups = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(run_group, str(input_dir), group, args.radius_m, args.spacing_m): name
+            for name, group in groups.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed_groups += 1
+                print(f"Tile group {name} failed: {str(e)}")
+                continue
+            with conn:
+                conn.executemany(INSERT_SQL, [
+                    {**row, 'radius_m': args.radius_m, 'computed_at': computed_at} for row in rows
+                ])
+            written += len(rows)
+            print(f"[{done}/{len(groups)}] {name}: {len(rows)}/{len(groups[name])} cities")
+
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"Wrote stats for {written}/{len(cities)} cities in {time.time() - started:.1f}s "
+          f"({failed_groups} tile groups failed)")
+
+
+if __name__ == "__main__":
+    main()
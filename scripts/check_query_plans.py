@@ -0,0 +1,107 @@
+"""
+Query plan gate for the hot db_utils queries.
+
+Runs EXPLAIN QUERY PLAN for each query and fails (exit status 1) if any
+step reads a table with a full SCAN instead of an index, then times each
+query through the read-only connection:
+
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --db /tmp/copy.db --iterations 1000
+
+Run ``python -m src.database.migrations`` first if the gate reports scans.
+"""
+import argparse
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database import db_utils
+
+CITY = ('Denver', 'Colorado')
+
+# (name, sql, sample params)
+HOT_QUERIES = [
+    ('states', db_utils.ALL_STATES_SQL, ()),
+    ('cities_in_state', db_utils.CITIES_IN_STATE_SQL, (CITY[1],)),
+    ('city_details', db_utils.CITY_DETAILS_SQL, ('[["Denver", "Colorado"], ["Austin", "Texas"]]',)),
+    ('city_zipcodes', db_utils.CITY_ZIPCODES_SQL, CITY),
+    ('city_ips', db_utils.CITY_IPS_SQL, CITY),
+    ('most_populous_cities', db_utils.MOST_POPULOUS_CITIES_SQL, (50,)),
+    ('cities_in_box', db_utils.CITIES_IN_BOX_SQL, (40.0, 39.5, -104.5, -105.2)),
+    ('city_search', db_utils.CITY_SEARCH_SQL, ('"den"*', 10)),
+    ('city_id', db_utils.CITY_ID_SQL, CITY),
+    ('zipcode_page', db_utils.ZIPCODE_PAGE_SQL, (1, '', '80', '81', 51)),
+    ('zipcode_count', db_utils.ZIPCODE_COUNT_SQL, (1, '80', '81')),
+    ('ip_page', db_utils.IP_PAGE_SQL, (1, '', '', '\U0010ffff', 51)),
+    ('ip_count', db_utils.IP_COUNT_SQL, (1, '', '\U0010ffff')),
+    ('city_elevation_stats', db_utils.CITY_ELEVATION_STATS_SQL, CITY),
+    ('cities_by_relief', db_utils.CITIES_BY_RELIEF_SQL, (20,)),
+    ('cities_by_relief_in_state', db_utils.CITIES_BY_RELIEF_IN_STATE_SQL, (CITY[1], 20)),
+]
+
+# Scans over query inputs or intermediate results rather than stored tables
+NOT_TABLE_SCANS = ('SCAN json_each', 'SCAN (subquery')
+
+
+def full_scans(conn, sql, params):
+    """Plan steps that scan a table without an index"""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    scans = [
+        detail for detail in plan
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'CONSTANT ROW' not in detail
+        and not _constrained_virtual_table(detail)
+        and not detail.startswith(NOT_TABLE_SCANS)
+    ]
+    return plan, scans
+
+
+def _constrained_virtual_table(detail):
+    """R*Tree / FTS lookups show as 'SCAN x VIRTUAL TABLE INDEX n:<constraints>'"""
+    if 'VIRTUAL TABLE INDEX' not in detail:
+        return False
+    _, _, constraints = detail.partition(':')
+    return bool(constraints.strip())
+
+
+def time_query(conn, sql, params, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query falls back to a full table scan")
+    parser.add_argument('--db', default=str(db_utils.DB_PATH))
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--verbose', action='store_true', help="Print every plan")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"{Path(args.db).resolve().as_uri()}?mode=ro", uri=True)
+    failed = False
+    for name, sql, params in HOT_QUERIES:
+        plan, scans = full_scans(conn, sql, params)
+        median_us = time_query(conn, sql, params, args.iterations)
+        status = 'FAIL' if scans else 'ok'
+        print(f"{status:<4} {name:<22} {median_us:9.1f} us")
+        if scans or args.verbose:
+            for detail in plan:
+                marker = '!!' if detail in scans else '  '
+                print(f"     {marker} {detail}")
+        failed = failed or bool(scans)
+    conn.close()
+
+    if failed:
+        print("FAIL: some hot queries do a full table scan")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
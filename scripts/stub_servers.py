@@ -0,0 +1,89 @@
+"""
+Local stand-in HTTP servers for benchmarks.
+
+Each server runs in a daemon thread on 127.0.0.1 and adds a fixed latency
+to every response so network-bound code can be measured reproducibly.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Threaded HTTP server on a free localhost port, stopped with stop()."""
+
+    def __init__(self, handler_class):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.request_count = 0
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_tile_handler(tile_bytes, latency_seconds=0.0, content_type='image/jpeg'):
+    """Handler that answers every GET with the same tile after a delay"""
+
+    class TileHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real tile servers
+
+        def do_GET(self):
+            self.server.request_count += 1
+            time.sleep(latency_seconds)
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(tile_bytes)))
+            self.end_headers()
+            self.wfile.write(tile_bytes)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TileHandler
+
+
+def make_weather_handler(latency_seconds=0.0, temp=72.0):
+    """Handler that answers every GET with a One Call style JSON body after a delay"""
+    import json
+
+    body = json.dumps({
+        'current': {
+            'temp': temp,
+            'feels_like': temp - 2,
+            'humidity': 40,
+            'wind_speed': 5.0,
+            'weather': [{'description': 'clear sky'}]
+        },
+        'alerts': []
+    }).encode()
+
+    class WeatherHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.server.request_count += 1
+            time.sleep(latency_seconds)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return WeatherHandler
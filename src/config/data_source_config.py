@@ -3,33 +3,32 @@ from dotenv import load_dotenv
 from src.data_sources.factory import DataSourceFactory, DataSourceType
 from typing import Optional, Union
 from pathlib import Path
+from functools import lru_cache
 
-# Force reload environment variables
-load_dotenv(override=True)
-
-# Debug print all relevant environment variables
-print("Environment variables:")
-print(f"MOUNT_POINT: {os.getenv('MOUNT_POINT')}")
-print(f"LOCAL_DATA_PATH: {os.getenv('LOCAL_DATA_PATH')}")
-print(f"DEFAULT_DATA_SOURCE: {os.getenv('DEFAULT_DATA_SOURCE')}")
-
-# Default paths and settings
-DEFAULT_LOCAL_PATH = os.getenv('LOCAL_DATA_PATH')
-DEFAULT_MOUNT_POINT = os.getenv('MOUNT_POINT', '~/s3bucket').strip("'").strip('"').rstrip('/')  # Clean up the path
-print(f"Cleaned MOUNT_POINT: {DEFAULT_MOUNT_POINT}")  # Debug print
-DEFAULT_BUCKET_NAME = os.getenv('AWS_BUCKET_NAME')
-DEFAULT_REGION = os.getenv('AWS_REGION_NAME')
+@lru_cache(maxsize=None)
+def get_settings() -> dict:
+    """
+    Load data source settings from the environment (and .env) on first use.
 
-# Default data source to use (configurable via environment variable)
-DEFAULT_SOURCE = os.getenv('DEFAULT_DATA_SOURCE', 'mounted_s3').strip("'").strip('"').strip('/')  # Clean up the source name
-print(f"Cleaned DEFAULT_SOURCE: {DEFAULT_SOURCE}")  # Debug print
+    Kept out of import time so importing this module stays cheap and quiet.
+    """
+    load_dotenv(override=True)
+    return {
+        'local_path': os.getenv('LOCAL_DATA_PATH'),
+        'mount_point': os.getenv('MOUNT_POINT', '~/s3bucket').strip("'").strip('"').rstrip('/'),  # Clean up the path
+        'bucket_name': os.getenv('AWS_BUCKET_NAME'),
+        'region': os.getenv('AWS_REGION_NAME'),
+        # Default data source to use (configurable via environment variable)
+        'default_source': os.getenv('DEFAULT_DATA_SOURCE', 'mounted_s3').strip("'").strip('"').strip('/'),  # Clean up the source name
+    }
 
 # Create data source instances
 def get_local_source():
     """Get local file system data source."""
-    if not DEFAULT_LOCAL_PATH:
+    local_path = get_settings()['local_path']
+    if not local_path:
         raise ValueError("LOCAL_DATA_PATH environment variable is not set")
-    base_path = Path(DEFAULT_LOCAL_PATH).expanduser()
+    base_path = Path(local_path).expanduser()
     if not base_path.exists():
         raise ValueError(f"Local data path {base_path} does not exist")
     return DataSourceFactory.create(
@@ -40,7 +39,7 @@ def get_local_source():
 def get_mounted_s3_source():
     """Get mounted S3 bucket data source."""
     # Get the mount point from .env and clean it
-    mount_point = DEFAULT_MOUNT_POINT.strip("'").strip('"').rstrip('/')
+    mount_point = get_settings()['mount_point']
     print(f"Mount point from .env: {mount_point}")  # Debug print
     
     # Handle path expansion based on user
@@ -63,12 +62,13 @@ def get_mounted_s3_source():
 
 def get_boto3_s3_source():
     """Get boto3 S3 client data source."""
-    if not DEFAULT_BUCKET_NAME or not DEFAULT_REGION:
+    settings = get_settings()
+    if not settings['bucket_name'] or not settings['region']:
         raise ValueError("AWS_BUCKET_NAME and AWS_REGION_NAME environment variables must be set")
     return DataSourceFactory.create(
         source_type=DataSourceType.BOTO3,
-        bucket_name=DEFAULT_BUCKET_NAME,
-        region_name=DEFAULT_REGION
+        bucket_name=settings['bucket_name'],
+        region_name=settings['region']
     )
 
 # Dictionary mapping source names to their factory functions
@@ -105,13 +105,13 @@ def get_data_source(source_name: Optional[str] = None) -> DataSourceFactory:
     Get a data source instance by name.
     
     Args:
-        source_name: Name of the data source to use. If None, uses DEFAULT_SOURCE.
+        source_name: Name of the data source to use. If None, uses DEFAULT_DATA_SOURCE.
         
     Returns:
         Configured data source instance
     """
     if source_name is None:
-        source_name = DEFAULT_SOURCE
+        source_name = get_settings()['default_source']
         print(f"Using default source: {source_name}")  # Debug print
         
     if source_name not in DATA_SOURCES:
@@ -7,7 +7,6 @@ from dotenv import load_dotenv
 from .base import BaseDataSource
 from .local import LocalDataSource
 from .mounted_s3 import MountedS3DataSource
-from .boto3_s3 import Boto3S3DataSource
 
 class DataSourceType(Enum):
     LOCAL = "local"
@@ -55,6 +54,7 @@ class DataSourceFactory:
         else:  # BOTO3
             if not bucket_name:
                 raise ValueError("bucket_name is required for BOTO3 source type")
+            from .boto3_s3 import Boto3S3DataSource  # boto3 is slow to import; only load it when used
             return Boto3S3DataSource(
                 bucket_name=bucket_name,
                 aws_access_key_id=aws_access_key_id,
@@ -1,16 +1,13 @@
 import math
 from dataclasses import dataclass
 from typing import Tuple
-import rasterio
-from rasterio.merge import merge
-from rasterio.mask import mask
 from pathlib import Path
 import os
 from typing import List
-import math
-from shapely.geometry import box
 import numpy as np
-from src.config.data_source_config import get_data_source
+
+# rasterio and shapely are imported inside the functions that read or write
+# rasters, so the bounds helpers stay cheap to import
 
 @dataclass
 class Bounds:
@@ -123,6 +120,8 @@ def save_combined_tiff(merged_data, merged_transform, meta, output_path: str) ->
     Returns:
         bool: True if successful, False otherwise
     """
+    import rasterio
+    
     try:
         # Update metadata with merged dimensions and transform
         meta.update({
@@ -155,6 +154,10 @@ def crop_tiff(input_path: str, bounds, output_path: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
+    import rasterio
+    from rasterio.mask import mask
+    from shapely.geometry import box
+    
     try:
         # Create a bounding box for cropping
         bbox = box(bounds.left, bounds.bottom, bounds.right, bounds.top)
@@ -190,7 +193,7 @@ def crop_tiff(input_path: str, bounds, output_path: str) -> bool:
         return False
 
 
-def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float, elevation: float, crop_to_bounds: bool = True) -> bool:
+def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float, elevation: float, crop_to_bounds: bool = True, cancel_event=None) -> bool:
     """
     Combine multiple TIFF files into a single TIFF file based on bounds calculated from a point.
     
@@ -201,10 +204,15 @@ def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float,
         lon (float): Longitude of the center point
         elevation (float): Elevation in meters
         crop_to_bounds (bool): Whether to crop the output to the calculated bounds
+        cancel_event (threading.Event): Optional event; when set, the work stops
+            between stages and False is returned
         
     Returns:
         bool: True if successful, False otherwise
     """
+    import rasterio
+    from rasterio.merge import merge
+    
     try:
         # Calculate bounds and get required file names
         bounds = calculate_zoom_bounds(lat, lon, elevation)
@@ -237,6 +245,10 @@ def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float,
             
         print(f"\nFound {len(tiff_files)} files to combine")
         
+        if cancel_event is not None and cancel_event.is_set():
+            print("Combine cancelled before merge")
+            return False
+        
         # Open all TIFF files
         src_files = [rasterio.open(f) for f in tiff_files]
         
@@ -250,6 +262,10 @@ def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float,
         for src in src_files:
             src.close()
         
+        if cancel_event is not None and cancel_event.is_set():
+            print("Combine cancelled after merge")
+            return False
+        
         # Create paths for temporary and final files
         base_path = output_path.replace('.tif', '')
         temp_path = f"{base_path}_temp.tif"
@@ -257,6 +273,11 @@ def combine_tiff_files(input_dir: str, output_path: str, lat: float, lon: float,
         # First save the full combined file to temp
         if not save_combined_tiff(merged_data, merged_transform, meta, temp_path):
             return False
+        
+        if cancel_event is not None and cancel_event.is_set():
+            print("Combine cancelled before crop")
+            os.remove(temp_path)
+            return False
             
         # If we want the cropped version
         if crop_to_bounds:
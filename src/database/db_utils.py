@@ -1,114 +1,554 @@
+import ipaddress
+import json
+import os
+import re
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent.parent.parent / 'data' / 'urbexfun.db'
 
+# How read connections reach the data:
+#   file   - read-only file connection, no memory mapping
+#   mmap   - read-only file connection with the file memory-mapped (default)
+#   memory - a shared in-memory copy loaded with the backup API at first use
+DB_MODE = os.getenv('DB_MODE', 'mmap')
+DB_MODES = ('file', 'mmap', 'memory')
+
+# File connections treat the shipped database as immutable (no locking);
+# set DB_IMMUTABLE=0 if the file is written to while the app runs
+DB_IMMUTABLE = os.getenv('DB_IMMUTABLE', '1') != '0'
+MMAP_SIZE = 64 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+CACHED_STATEMENTS = 64
+
+# The file's mtime and size are checked at most this often; when they change
+# connections are reopened (and a new memory snapshot is loaded) on next use
+CHANGE_CHECK_SECONDS = 2.0
+
+_local = threading.local()
+_state_lock = threading.Lock()
+_generation = None        # (mtime_ns, size) of the file the current connections read
+_checked_at = 0.0
+_snapshot = None          # (uri, keeper connection) for memory mode
+_previous_snapshot = None # Kept one swap longer for threads still opening it
+_state_pid = os.getpid()
+
 def get_db_connection():
     """Create a database connection"""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # This enables column access by name
     return conn
 
+def _file_generation():
+    stat = os.stat(DB_PATH)
+    return stat.st_mtime_ns, stat.st_size
+
+def _load_snapshot(generation):
+    """Copy the file into a new named shared-cache in-memory database"""
+    uri = f"file:urbexfun_{os.getpid()}_{generation[0]}_{generation[1]}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    source = sqlite3.connect(f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        source.backup(keeper)
+    finally:
+        source.close()
+    return uri, keeper
+
+def db_generation():
+    """
+    Identify the version of the database that reads currently see.
+
+    Checks the file for changes (throttled). In memory mode a changed file
+    is loaded into a new snapshot and swapped in; threads move to it the
+    next time they ask for a connection, and the old snapshot is freed when
+    its last connection closes.
+    """
+    global _generation, _checked_at, _snapshot, _previous_snapshot, _state_pid
+    now = time.monotonic()
+    if _generation is not None and now - _checked_at < CHANGE_CHECK_SECONDS and _state_pid == os.getpid():
+        return _generation
+    with _state_lock:
+        if _state_pid != os.getpid():
+            # In-memory databases are per process; a forked child loads its own
+            _generation, _snapshot, _previous_snapshot, _state_pid = None, None, None, os.getpid()
+        if _generation is None or now - _checked_at >= CHANGE_CHECK_SECONDS:
+            generation = _file_generation()
+            if generation != _generation:
+                if DB_MODE == 'memory':
+                    # Build the new snapshot before swapping, so reads never see a half copy
+                    snapshot = _load_snapshot(generation)
+                    if _previous_snapshot is not None:
+                        _previous_snapshot[1].close()
+                    _previous_snapshot, _snapshot = _snapshot, snapshot
+                _generation = generation
+            _checked_at = now
+        return _generation
+
+def _open_read_connection():
+    if DB_MODE == 'memory':
+        uri = _snapshot[0]
+    else:
+        uri = f"{DB_PATH.resolve().as_uri()}?mode=ro"
+        if DB_IMMUTABLE:
+            uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    if DB_MODE == 'mmap':
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+def get_read_connection():
+    """
+    Get this thread's read-only connection, opening it on first use.
+
+    Connections are reused for the life of the thread, so sqlite3's
+    statement cache keeps the queries below prepared between calls. They
+    are reopened after a fork or when the database file changes.
+    """
+    if DB_MODE not in DB_MODES:
+        raise ValueError(f"Unknown DB_MODE: {DB_MODE}. Use one of: {', '.join(DB_MODES)}")
+    generation = db_generation()
+    conn = getattr(_local, 'conn', None)
+    # Connections must not cross a fork, so reopen in a new process
+    if conn is None or _local.pid != os.getpid() or _local.generation != generation:
+        if conn is not None:
+            conn.close()
+        conn = _open_read_connection()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.generation = generation
+    return conn
+
+def close_read_connection():
+    """Close this thread's read-only connection, if any"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+def set_db_mode(mode):
+    """Switch DB_MODE at runtime (for benchmarks); threads reconnect on next use"""
+    global DB_MODE, _generation, _snapshot, _previous_snapshot
+    if mode not in DB_MODES:
+        raise ValueError(f"Unknown DB_MODE: {mode}. Use one of: {', '.join(DB_MODES)}")
+    with _state_lock:
+        DB_MODE = mode
+        _generation = None
+        _snapshot = _previous_snapshot = None
+    close_read_connection()
+
+
+# Queries are module constants so each is prepared once per connection
+ALL_STATES_SQL = "SELECT state_name FROM states ORDER BY state_name"
+
+CITIES_IN_STATE_SQL = """
+    SELECT c.city_name
+    FROM cities c
+    JOIN states s ON c.state_id = s.state_id
+    WHERE s.state_name = ?
+    ORDER BY c.city_name
+"""
+
+# Keys are passed as one JSON array of [city, state] pairs, so any number
+# of cities share a single prepared statement and a single round trip
+CITY_DETAILS_SQL = """
+    WITH wanted(city_name, state_name) AS (
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]')
+        FROM json_each(?)
+    )
+    SELECT
+        c.city_id,
+        c.city_name,
+        s.state_name,
+        s.state_abbrev,
+        c.population_2024,
+        c.population_2020,
+        c.annual_change,
+        c.density_per_mile2,
+        c.area_mile2,
+        coord.latitude,
+        coord.longitude,
+        (SELECT GROUP_CONCAT(zip_code) FROM (
+            SELECT z.zip_code FROM zip_codes z WHERE z.city_id = c.city_id ORDER BY z.zip_code
+        )) AS zip_codes,
+        (SELECT COUNT(*) FROM ip_addresses ip WHERE ip.city_id = c.city_id) AS ip_count,
+        e.elevation_m,
+        e.min_m AS elevation_min_m,
+        e.max_m AS elevation_max_m,
+        e.mean_m AS elevation_mean_m,
+        e.relief_m,
+        e.radius_m AS elevation_radius_m
+    FROM wanted w
+    JOIN states s ON s.state_name = w.state_name
+    JOIN cities c ON c.city_name = w.city_name AND c.state_id = s.state_id
+    LEFT JOIN lat_long_coords coord ON c.city_id = coord.city_id
+    LEFT JOIN city_elevation_stats e ON c.city_id = e.city_id
+"""
+
+CITY_ELEVATION_STATS_SQL = """
+    SELECT e.*
+    FROM city_elevation_stats e
+    JOIN cities c ON c.city_id = e.city_id
+    JOIN states s ON c.state_id = s.state_id
+    WHERE c.city_name = ? AND s.state_name = ?
+"""
+
+CITIES_BY_RELIEF_SQL = """
+    SELECT c.city_name, s.state_name, s.state_abbrev, c.population_2024,
+           e.elevation_m, e.min_m, e.max_m, e.mean_m, e.relief_m
+    FROM city_elevation_stats e
+    CROSS JOIN cities c ON c.city_id = e.city_id  -- CROSS JOIN keeps e first, walking the relief index
+    JOIN states s ON c.state_id = s.state_id
+    WHERE e.relief_m IS NOT NULL
+    ORDER BY e.relief_m DESC
+    LIMIT ?
+"""
+
+CITIES_BY_RELIEF_IN_STATE_SQL = """
+    SELECT c.city_name, s.state_name, s.state_abbrev, c.population_2024,
+           e.elevation_m, e.min_m, e.max_m, e.mean_m, e.relief_m
+    FROM states s
+    JOIN cities c ON c.state_id = s.state_id
+    JOIN city_elevation_stats e ON c.city_id = e.city_id
+    WHERE s.state_name = ? AND e.relief_m IS NOT NULL
+    ORDER BY e.relief_m DESC
+    LIMIT ?
+"""
+
+CITY_COORDINATES_BY_ID_SQL = """
+    SELECT c.city_id, c.city_name, s.state_name, coord.latitude, coord.longitude
+    FROM cities c
+    JOIN states s ON c.state_id = s.state_id
+    JOIN lat_long_coords coord ON c.city_id = coord.city_id
+    WHERE coord.latitude IS NOT NULL AND coord.longitude IS NOT NULL
+    ORDER BY c.city_id
+"""
+
+CITY_ZIPCODES_SQL = """
+    SELECT z.zip_code
+    FROM zip_codes z
+    JOIN cities c ON z.city_id = c.city_id
+    JOIN states s ON c.state_id = s.state_id
+    WHERE c.city_name = ? AND s.state_name = ?
+    ORDER BY z.zip_code
+"""
+
+CITY_IPS_SQL = """
+    SELECT ip.ip_address
+    FROM ip_addresses ip
+    JOIN cities c ON ip.city_id = c.city_id
+    JOIN states s ON c.state_id = s.state_id
+    WHERE c.city_name = ? AND s.state_name = ?
+    ORDER BY ip.ip_address
+"""
+
+CITY_ID_SQL = """
+    SELECT c.city_id
+    FROM cities c
+    JOIN states s ON c.state_id = s.state_id
+    WHERE c.city_name = ? AND s.state_name = ?
+"""
+
+# Keyset pages: rows after a cursor value within an optional prefix range
+# [lo, hi), in index order on (city_id, value)
+ZIPCODE_PAGE_SQL = """
+    SELECT zip_code FROM zip_codes
+    WHERE city_id = ? AND zip_code > ? AND zip_code >= ? AND zip_code < ?
+    ORDER BY zip_code
+    LIMIT ?
+"""
+
+ZIPCODE_COUNT_SQL = """
+    SELECT COUNT(*) FROM zip_codes
+    WHERE city_id = ? AND zip_code >= ? AND zip_code < ?
+"""
+
+IP_PAGE_SQL = """
+    SELECT ip_address FROM ip_addresses
+    WHERE city_id = ? AND ip_address > ? AND ip_address >= ? AND ip_address < ?
+    ORDER BY ip_address
+    LIMIT ?
+"""
+
+IP_COUNT_SQL = """
+    SELECT COUNT(*) FROM ip_addresses
+    WHERE city_id = ? AND ip_address >= ? AND ip_address < ?
+"""
+
+MOST_POPULOUS_CITIES_SQL = """
+    SELECT c.city_name, s.state_name, c.population_2024, coord.latitude, coord.longitude
+    FROM cities c
+    JOIN states s ON c.state_id = s.state_id
+    JOIN lat_long_coords coord ON c.city_id = coord.city_id
+    WHERE coord.latitude IS NOT NULL AND coord.longitude IS NOT NULL
+    ORDER BY c.population_2024 DESC
+    LIMIT ?
+"""
+
+ALL_CITY_COORDINATES_SQL = """
+    SELECT c.city_name, s.state_name, s.state_abbrev, c.population_2024, coord.latitude, coord.longitude
+    FROM cities c
+    JOIN states s ON c.state_id = s.state_id
+    JOIN lat_long_coords coord ON c.city_id = coord.city_id
+"""
+
+CITIES_IN_BOX_SQL = """
+    SELECT c.city_name, s.state_name, c.population_2024, coord.latitude, coord.longitude
+    FROM city_rtree r
+    JOIN cities c ON c.city_id = r.city_id
+    JOIN states s ON c.state_id = s.state_id
+    JOIN lat_long_coords coord ON c.city_id = coord.city_id
+    WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ?
+"""
+
+CITY_SEARCH_SQL = """
+    SELECT c.city_name, s.state_name, s.state_abbrev, c.population_2024
+    FROM city_search f
+    JOIN cities c ON c.city_id = f.rowid
+    JOIN states s ON c.state_id = s.state_id
+    WHERE city_search MATCH ?
+    ORDER BY c.population_2024 DESC
+    LIMIT ?
+"""
+
+# Mean Earth radius used for haversine distances
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * 3.141592653589793 / 180
+
+
 def get_all_states():
     """Get all states from the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT state_name FROM states ORDER BY state_name")
-    states = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    return states
+    conn = get_read_connection()
+    return [row[0] for row in conn.execute(ALL_STATES_SQL)]
 
 def get_cities_in_state(state_name):
     """Get all cities in a given state"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT c.city_name 
-        FROM cities c
-        JOIN states s ON c.state_id = s.state_id
-        WHERE s.state_name = ?
-        ORDER BY c.city_name
-    """, (state_name,))
-    
-    cities = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    return cities
+    conn = get_read_connection()
+    return [row[0] for row in conn.execute(CITIES_IN_STATE_SQL, (state_name,))]
+
+def get_city_details_many(keys):
+    """
+    Get info, zip codes and IP counts for many cities in one query.
+
+    IP addresses themselves are not loaded; page through them with
+    get_city_ips_page when they are shown.
+
+    Args:
+        keys: Iterable of (city_name, state_name)
+
+    Returns:
+        dict mapping (city_name, state_name) to a details dict (the
+        get_city_info fields plus zip_count and ip_count); cities that are
+        not found are left out
+    """
+    keys = list(dict.fromkeys((city, state) for city, state in keys))
+    if not keys:
+        return {}
+    conn = get_read_connection()
+    details = {}
+    for row in conn.execute(CITY_DETAILS_SQL, (json.dumps(keys),)):
+        data = dict(row)
+        data['zip_codes'] = data['zip_codes'].split(',') if data['zip_codes'] else []
+        data['zip_count'] = len(data['zip_codes'])
+        details[(data['city_name'], data['state_name'])] = data
+    return details
 
 def get_city_info(city_name, state_name):
     """Get all information for a specific city"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT 
-            c.city_name,
-            s.state_name,
-            s.state_abbrev,
-            c.population_2024,
-            c.population_2020,
-            c.annual_change,
-            c.density_per_mile2,
-            c.area_mile2,
-            coord.latitude,
-            coord.longitude,
-            GROUP_CONCAT(z.zip_code) as zip_codes
-        FROM cities c
-        JOIN states s ON c.state_id = s.state_id
-        LEFT JOIN lat_long_coords coord ON c.city_id = coord.city_id
-        LEFT JOIN zip_codes z ON c.city_id = z.city_id
-        WHERE c.city_name = ? AND s.state_name = ?
-        GROUP BY c.city_id
-    """, (city_name, state_name))
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    if result:
-        # Convert to dictionary and parse zip codes string
-        data = dict(result)
-        if data['zip_codes']:
-            data['zip_codes'] = data['zip_codes'].split(',')
-        else:
-            data['zip_codes'] = []
-        return data
-    return None
+    return get_city_details_many([(city_name, state_name)]).get((city_name, state_name))
 
 def get_city_zipcodes(city_name, state_name):
     """Get all zip codes for a specific city"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT z.zip_code
-        FROM zip_codes z
-        JOIN cities c ON z.city_id = c.city_id
-        JOIN states s ON c.state_id = s.state_id
-        WHERE c.city_name = ? AND s.state_name = ?
-        ORDER BY z.zip_code
-    """, (city_name, state_name))
-    
-    zipcodes = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return zipcodes
+    conn = get_read_connection()
+    return [row[0] for row in conn.execute(CITY_ZIPCODES_SQL, (city_name, state_name))]
 
 def get_city_ips(city_name, state_name):
     """Get all IP addresses for a specific city"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT ip.ip_address
-        FROM ip_addresses ip
-        JOIN cities c ON ip.city_id = c.city_id
-        JOIN states s ON c.state_id = s.state_id
-        WHERE c.city_name = ? AND s.state_name = ?
-        ORDER BY ip.ip_address
-    """, (city_name, state_name))
-    
-    ip_addresses = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return ip_addresses 
\ No newline at end of file
+    conn = get_read_connection()
+    return [row[0] for row in conn.execute(CITY_IPS_SQL, (city_name, state_name))]
+
+def _prefix_range(prefix):
+    """[lo, hi) string range matching everything that starts with prefix"""
+    if not prefix:
+        return '', '\U0010ffff'
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _city_id(conn, city_name, state_name):
+    row = conn.execute(CITY_ID_SQL, (city_name, state_name)).fetchone()
+    return row[0] if row else None
+
+def _keyset_page(page_sql, city_name, state_name, after, prefix, limit):
+    conn = get_read_connection()
+    city_id = _city_id(conn, city_name, state_name)
+    if city_id is None:
+        return {'items': [], 'next_after': None}
+    lo, hi = _prefix_range(prefix.strip())
+    # One extra row tells whether there is a next page
+    items = [row[0] for row in conn.execute(page_sql, (city_id, after or '', lo, hi, limit + 1))]
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {'items': items, 'next_after': items[-1] if has_more else None}
+
+def _keyset_count(count_sql, city_name, state_name, prefix):
+    conn = get_read_connection()
+    city_id = _city_id(conn, city_name, state_name)
+    if city_id is None:
+        return 0
+    return conn.execute(count_sql, (city_id, *_prefix_range(prefix.strip()))).fetchone()[0]
+
+def get_city_zipcodes_page(city_name, state_name, after=None, prefix='', limit=50):
+    """
+    Get one page of a city's zip codes in order.
+
+    Args:
+        after: Last zip code of the previous page (None for the first page)
+        prefix: Only zip codes starting with this text
+        limit: Page size
+
+    Returns:
+        dict with 'items' and 'next_after' (the cursor for the next page, or None)
+    """
+    return _keyset_page(ZIPCODE_PAGE_SQL, city_name, state_name, after, prefix, limit)
+
+def count_city_zipcodes(city_name, state_name, prefix=''):
+    """Count a city's zip codes, optionally only those starting with prefix"""
+    return _keyset_count(ZIPCODE_COUNT_SQL, city_name, state_name, prefix)
+
+def get_city_ips_page(city_name, state_name, after=None, prefix='', limit=50):
+    """Get one page of a city's IP addresses in order (see get_city_zipcodes_page)"""
+    return _keyset_page(IP_PAGE_SQL, city_name, state_name, after, prefix, limit)
+
+def count_city_ips(city_name, state_name, prefix=''):
+    """Count a city's IP addresses, optionally only those starting with prefix"""
+    return _keyset_count(IP_COUNT_SQL, city_name, state_name, prefix)
+
+def get_city_elevation_stats(city_name, state_name):
+    """Get precomputed terrain statistics for a city, or None if not computed"""
+    conn = get_read_connection()
+    row = conn.execute(CITY_ELEVATION_STATS_SQL, (city_name, state_name)).fetchone()
+    return dict(row) if row else None
+
+def get_cities_by_relief(limit=20, state_name=None):
+    """Get cities ranked by terrain relief (max - min elevation around them), highest first"""
+    conn = get_read_connection()
+    if state_name is None:
+        return [dict(row) for row in conn.execute(CITIES_BY_RELIEF_SQL, (limit,))]
+    return [dict(row) for row in conn.execute(CITIES_BY_RELIEF_IN_STATE_SQL, (state_name, limit))]
+
+def get_most_populous_cities(limit):
+    """Get the most populous cities that have coordinates, largest first"""
+    conn = get_read_connection()
+    return [dict(row) for row in conn.execute(MOST_POPULOUS_CITIES_SQL, (limit,))]
+
+def get_all_city_coordinates():
+    """Get every city that has coordinates, with its state name and abbreviation"""
+    conn = get_read_connection()
+    return [dict(row) for row in conn.execute(ALL_CITY_COORDINATES_SQL)]
+
+def _cities_in_box(conn, south, north, west, east):
+    return [dict(row) for row in conn.execute(CITIES_IN_BOX_SQL, (north, south, east, west))]
+
+def cities_in_bounds(bounds):
+    """
+    Get cities inside a bounding box, most populous first.
+
+    Args:
+        bounds: Object with left, bottom, right and top in degrees
+    """
+    conn = get_read_connection()
+    cities = _cities_in_box(conn, bounds.bottom, bounds.top, bounds.left, bounds.right)
+    cities.sort(key=lambda city: -(city['population_2024'] or 0))
+    return cities
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points"""
+    import numpy as np
+
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def nearest_cities(lat, lon, k=5):
+    """
+    Get the k cities closest to a point by great-circle distance.
+
+    Candidates come from the R*Tree in a box that doubles until it holds k
+    cities; the box is then widened to the k-th candidate's distance so no
+    closer city outside it is missed, and candidates are re-ranked by
+    haversine distance.
+
+    Returns:
+        List of city dicts with a distance_km key, nearest first
+    """
+    import numpy as np
+
+    conn = get_read_connection()
+    def box(radius_deg):
+        # Use the most poleward latitude in the box so its longitude span covers the radius
+        cos_lat = max(np.cos(np.radians(min(89.0, abs(lat) + radius_deg))), 0.01)
+        lon_radius = min(radius_deg / cos_lat, 180.0)
+        return _cities_in_box(conn, lat - radius_deg, lat + radius_deg, lon - lon_radius, lon + lon_radius)
+
+    radius = 0.5
+    candidates = box(radius)
+    while len(candidates) < k and radius < 180:
+        radius *= 2
+        candidates = box(radius)
+    if not candidates:
+        return []
+
+    distances = haversine_km(lat, lon, [c['latitude'] for c in candidates], [c['longitude'] for c in candidates])
+    kth_km = np.partition(distances, min(k, len(distances)) - 1)[min(k, len(distances)) - 1]
+    covering = kth_km / KM_PER_DEGREE
+    if covering > radius:
+        candidates = box(covering)
+        distances = haversine_km(lat, lon, [c['latitude'] for c in candidates], [c['longitude'] for c in candidates])
+
+    order = np.argsort(distances)[:k]
+    return [{**candidates[i], 'distance_km': float(distances[i])} for i in order]
+
+def _fts_prefix_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search_cities(prefix, limit=10):
+    """
+    Search cities by name, state name or abbreviation, most populous first.
+
+    Every word in the input must match the start of a word, so "spring il"
+    finds Springfield, Illinois.
+    """
+    query = _fts_prefix_query(prefix)
+    if not query:
+        return []
+    conn = get_read_connection()
+    return [dict(row) for row in conn.execute(CITY_SEARCH_SQL, (query, limit))]
+
+def ip_key(ip):
+    """
+    Sortable 16-byte key for an IP address (as stored in ip_addresses.ip_key).
+
+    IPv4 is stored as its IPv4-mapped IPv6 form (::ffff:a.b.c.d), so both
+    families share one byte order and one index.
+    """
+    address = ipaddress.ip_address(ip)
+    if address.version == 4:
+        address = ipaddress.IPv6Address(f"::ffff:{address}")
+    return address.packed
+
+def city_for_ip(ip):
+    """
+    Get the city for an IP address, or None.
+
+    Uses the in-memory sorted IP index (binary search). An address that is
+    not in the database falls back to the closest known address in the same
+    /24 (IPv4) or /64 (IPv6); the result's 'match' key says which.
+    """
+    from src.database.ip_index import get_ip_index
+    return get_ip_index().lookup(ip)
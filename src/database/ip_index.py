@@ -0,0 +1,168 @@
+import bisect
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.database.db_utils import db_generation, get_read_connection, ip_key
+
+# Fallback matches must share this many leading bits with a known address
+IPV4_NETWORK_BITS = 24
+IPV6_NETWORK_BITS = 64
+
+IP_KEYS_SQL = """
+    SELECT ip.ip_key, c.city_id, c.city_name, s.state_name, s.state_abbrev, c.population_2024,
+           coord.latitude, coord.longitude
+    FROM ip_addresses ip
+    JOIN cities c ON ip.city_id = c.city_id
+    JOIN states s ON c.state_id = s.state_id
+    LEFT JOIN lat_long_coords coord ON c.city_id = coord.city_id
+    WHERE ip.ip_key IS NOT NULL
+    ORDER BY ip.ip_key, c.population_2024 DESC
+"""
+
+# IPv4 addresses are keyed as ::ffff:a.b.c.d
+IPV4_MAPPED = 0xFFFF << 32
+
+
+def _is_ipv4_mapped(value: int) -> bool:
+    return value >> 32 == 0xFFFF
+
+
+def _parse(ip) -> Optional[Tuple[int, int]]:
+    """(128-bit key value, IP version) for an address, or None if it is invalid"""
+    text = str(ip).strip()
+    # inet_pton is several times faster than ipaddress for the common IPv4 case
+    try:
+        return IPV4_MAPPED | int.from_bytes(socket.inet_pton(socket.AF_INET, text), 'big'), 4
+    except OSError:
+        pass
+    try:
+        value = int.from_bytes(ip_key(text), 'big')
+    except ValueError:
+        return None
+    # An IPv4-mapped IPv6 literal is treated as the IPv4 address
+    return value, 4 if _is_ipv4_mapped(value) else 6
+
+
+class IpCityIndex:
+    """
+    Sorted in-memory arrays of known addresses for O(log n) IP -> city lookup.
+
+    Addresses are held as 128-bit integers (IPv4 mapped into IPv6). When one
+    address belongs to several cities the most populous one wins. IPv4 keys
+    are also kept in a NumPy uint32 array for batch lookups.
+    """
+
+    def __init__(self, rows):
+        """
+        Build the index.
+
+        Args:
+            rows: (ip_key, city dict) pairs sorted by key, most populous city first per key
+        """
+        self.keys: List[int] = []
+        self.cities: List[Dict] = []
+        for key, city in rows:
+            value = int.from_bytes(key, 'big')
+            if self.keys and self.keys[-1] == value:
+                continue  # Same address in a smaller city
+            self.keys.append(value)
+            self.cities.append(city)
+
+        mapped = [(k - IPV4_MAPPED, i) for i, k in enumerate(self.keys) if _is_ipv4_mapped(k)]
+        self.ipv4_keys = np.array([k for k, _ in mapped], dtype=np.uint32)
+        self.ipv4_rows = np.array([i for _, i in mapped], dtype=np.int64)
+
+    @classmethod
+    def from_db(cls, conn=None) -> 'IpCityIndex':
+        conn = conn or get_read_connection()
+        rows = []
+        for row in conn.execute(IP_KEYS_SQL):
+            row = dict(row)
+            key = row.pop('ip_key')
+            rows.append((key, row))
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, ip) -> Optional[Dict]:
+        """
+        City for an address: an exact match, else the closest known address
+        in the same network (/24 for IPv4, /64 for IPv6), else None.
+
+        Returns:
+            City dict with a 'match' key of 'exact' or 'network'
+        """
+        parsed = _parse(ip)
+        if parsed is None:
+            return None
+        value, version = parsed
+        host_bits = 32 - IPV4_NETWORK_BITS if version == 4 else 128 - IPV6_NETWORK_BITS
+
+        i = bisect.bisect_left(self.keys, value)
+        if i < len(self.keys) and self.keys[i] == value:
+            return {**self.cities[i], 'match': 'exact'}
+
+        # The nearest known addresses are the neighbours in sort order; on a
+        # tie the lower address wins
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self.keys) and self.keys[j] >> host_bits == value >> host_bits \
+                    and _is_ipv4_mapped(self.keys[j]) == (version == 4):
+                if best is None or abs(self.keys[j] - value) < abs(self.keys[best] - value):
+                    best = j
+        if best is None:
+            return None
+        return {**self.cities[best], 'match': 'network'}
+
+    def lookup_ipv4_batch(self, addresses):
+        """
+        Vectorized exact and same-/24 lookup for IPv4 addresses.
+
+        Args:
+            addresses: Array-like of IPv4 addresses as unsigned 32-bit integers
+
+        Returns:
+            int64 array of row indices into ``cities`` (-1 where nothing matched)
+        """
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        result = np.full(addresses.shape, -1, dtype=np.int64)
+        n = len(self.ipv4_keys)
+        if n == 0:
+            return result
+
+        pos = np.searchsorted(self.ipv4_keys, addresses)
+        right = np.minimum(pos, n - 1)
+        left = np.maximum(pos - 1, 0)
+        right_keys = self.ipv4_keys[right].astype(np.int64)
+        left_keys = self.ipv4_keys[left].astype(np.int64)
+        values = addresses.astype(np.int64)
+
+        shift = 32 - IPV4_NETWORK_BITS
+        right_ok = (right_keys >> shift) == (values >> shift)
+        left_ok = (left_keys >> shift) == (values >> shift)
+        # Equidistant neighbours resolve to the lower address, as in lookup()
+        use_right = right_ok & (~left_ok | (np.abs(right_keys - values) < np.abs(values - left_keys)))
+        use_left = left_ok & ~use_right
+
+        result[use_right] = self.ipv4_rows[right[use_right]]
+        result[use_left] = self.ipv4_rows[left[use_left]]
+        return result
+
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+def get_ip_index() -> IpCityIndex:
+    """Get the process-wide IP index, loading it on first use and when the database changes"""
+    global _index, _index_generation
+    with _index_lock:
+        generation = db_generation()
+        if _index is None or _index_generation != generation:
+            _index = IpCityIndex.from_db()
+            _index_generation = generation
+        return _index
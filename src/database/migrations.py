@@ -0,0 +1,205 @@
+"""
+Schema migrations for urbexfun.db.
+
+The applied version is kept in ``PRAGMA user_version``. Each migration runs in
+its own transaction, followed by ``ANALYZE`` so the query planner has fresh
+statistics:
+
+    python -m src.database.migrations              # migrate data/urbexfun.db
+    python -m src.database.migrations --db other.db
+    python -m src.database.migrations --status
+    python -m src.database.migrations --rebuild    # after editing source tables
+"""
+import argparse
+import sqlite3
+from pathlib import Path
+
+from src.database.db_utils import DB_PATH, ip_key
+
+def rebuild_city_rtree(conn):
+    """Repopulate the city R*Tree from lat_long_coords (one point box per city)"""
+    conn.execute("DELETE FROM city_rtree")
+    conn.execute("""
+        INSERT INTO city_rtree (city_id, min_lat, max_lat, min_lon, max_lon)
+        SELECT city_id, latitude, latitude, longitude, longitude
+        FROM lat_long_coords
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    """)
+
+
+def rebuild_city_search(conn):
+    """Repopulate the city search index (rowid = city_id)"""
+    # Contentless tables are cleared with the special delete-all command
+    conn.execute("INSERT INTO city_search (city_search) VALUES ('delete-all')")
+    conn.execute("""
+        INSERT INTO city_search (rowid, city_name, state_name, state_abbrev)
+        SELECT c.city_id, c.city_name, s.state_name, s.state_abbrev
+        FROM cities c
+        JOIN states s ON c.state_id = s.state_id
+    """)
+
+
+def rebuild_ip_keys(conn):
+    """Fill ip_addresses.ip_key with the sortable 16-byte form of each address"""
+    rows = conn.execute("SELECT ip_id, ip_address FROM ip_addresses").fetchall()
+    updates = []
+    for ip_id, ip_address in rows:
+        try:
+            updates.append((ip_key(ip_address.strip()), ip_id))
+        except ValueError:
+            updates.append((None, ip_id))  # Not a valid address; left out of lookups
+    conn.executemany("UPDATE ip_addresses SET ip_key = ? WHERE ip_id = ?", updates)
+
+
+# (version, description, statements), applied in order. A statement may be
+# a callable taking the connection, for data rebuilds.
+MIGRATIONS = [
+    (1, "Covering indexes for the city lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_states_name ON states (state_name)",
+        "CREATE INDEX IF NOT EXISTS idx_cities_state_name ON cities (state_id, city_name)",
+        "CREATE INDEX IF NOT EXISTS idx_cities_population ON cities (population_2024)",
+        "CREATE INDEX IF NOT EXISTS idx_zip_codes_city ON zip_codes (city_id, zip_code)",
+        "CREATE INDEX IF NOT EXISTS idx_ip_addresses_city ON ip_addresses (city_id, ip_address)",
+    ]),
+    (2, "R*Tree spatial index over city coordinates", [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS city_rtree USING rtree(city_id, min_lat, max_lat, min_lon, max_lon)",
+        rebuild_city_rtree,
+    ]),
+    (3, "FTS5 index over city and state names", [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS city_search USING fts5(
+            city_name, state_name, state_abbrev,
+            content='',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3'
+        )
+        """,
+        rebuild_city_search,
+    ]),
+    (4, "Sortable binary IP keys for IP to city lookup", [
+        "ALTER TABLE ip_addresses ADD COLUMN ip_key BLOB",
+        rebuild_ip_keys,
+        "CREATE INDEX IF NOT EXISTS idx_ip_addresses_key ON ip_addresses (ip_key, city_id)",
+    ]),
+    (5, "Per-city elevation statistics (filled by scripts/build_elevation_stats.py)", [
+        """
+        CREATE TABLE IF NOT EXISTS city_elevation_stats (
+            city_id INTEGER PRIMARY KEY,
+            radius_m REAL NOT NULL,
+            elevation_m REAL,
+            min_m REAL,
+            max_m REAL,
+            mean_m REAL,
+            relief_m REAL,
+            sample_count INTEGER,
+            computed_at TEXT NOT NULL,
+            FOREIGN KEY (city_id) REFERENCES cities(city_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_city_elevation_relief ON city_elevation_stats (relief_m)",
+    ]),
+]
+
+# Derived tables rebuilt by --rebuild after the source tables change
+REBUILDS = {
+    'city_rtree': rebuild_city_rtree,
+    'city_search': rebuild_city_search,
+    'ip_keys': rebuild_ip_keys,
+}
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=DB_PATH, target=None):
+    """
+    Apply pending migrations.
+
+    Args:
+        db_path: Database to migrate
+        target: Stop after this version (defaults to the latest)
+
+    Returns:
+        List of versions applied
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    applied = []
+    try:
+        current = get_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current or (target is not None and version > target):
+                continue
+            print(f"Applying migration {version}: {description}")
+            conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+
+        if applied:
+            conn.execute("ANALYZE")
+            # Keep the shipped file compact after rebuilding indexes
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return applied
+
+
+def rebuild(db_path=DB_PATH, names=None):
+    """Rebuild derived tables (all of them by default) in one transaction"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        try:
+            for name in names or REBUILDS:
+                print(f"Rebuilding {name}")
+                REBUILDS[name](conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations to urbexfun.db")
+    parser.add_argument('--db', default=str(DB_PATH), help="Database file")
+    parser.add_argument('--target', type=int, help="Migrate up to this version")
+    parser.add_argument('--status', action='store_true', help="Show the current version and exit")
+    parser.add_argument('--rebuild', nargs='*', choices=sorted(REBUILDS), metavar='TABLE',
+                        help="Rebuild derived tables after editing source data (all when none are named)")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f"Database not found: {args.db}")
+
+    if args.status:
+        conn = sqlite3.connect(args.db)
+        version = get_version(conn)
+        conn.close()
+        latest = MIGRATIONS[-1][0]
+        print(f"{args.db}: version {version} (latest {latest})")
+        return
+
+    if args.rebuild is not None:
+        migrate(args.db)
+        rebuild(args.db, args.rebuild)
+        return
+
+    applied = migrate(args.db, args.target)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Already up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import difflib
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Minimum difflib similarity for a fuzzy city or state match
+FUZZY_CUTOFF = 0.85
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and expand 'St.' so names compare loosely"""
+    text = re.sub(r'\bst\b\.?', 'saint', text.strip().lower())
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+class _CityIndex:
+    """All cities with coordinates, keyed by normalized name within each state."""
+
+    def __init__(self, rows: List[Dict]):
+        self.by_state: Dict[str, Dict[str, Dict]] = {}
+        self.state_keys: Dict[str, str] = {}
+        for row in rows:
+            state = normalize(row['state_name'])
+            self.state_keys[state] = state
+            self.state_keys[normalize(row['state_abbrev'])] = state
+            cities = self.by_state.setdefault(state, {})
+            name = normalize(row['city_name'])
+            # Keep the most populous city if two normalize to the same name
+            if name not in cities or (row['population_2024'] or 0) > (cities[name]['population_2024'] or 0):
+                cities[name] = row
+
+    def state(self, state: str) -> Optional[str]:
+        key = normalize(state)
+        if key in self.state_keys:
+            return self.state_keys[key]
+        close = difflib.get_close_matches(key, self.state_keys, n=1, cutoff=FUZZY_CUTOFF)
+        return self.state_keys[close[0]] if close else None
+
+    def city(self, city: str, state: str) -> Optional[Dict]:
+        state_key = self.state(state)
+        if state_key is None:
+            return None
+        cities = self.by_state[state_key]
+        key = normalize(city)
+        if key in cities:
+            return cities[key]
+        close = difflib.get_close_matches(key, cities, n=1, cutoff=FUZZY_CUTOFF)
+        return cities[close[0]] if close else None
+
+
+def _city_index() -> _CityIndex:
+    global _index, _index_generation
+    from src.database.db_utils import db_generation, get_all_city_coordinates
+    with _index_lock:
+        generation = db_generation()
+        if _index is None or _index_generation != generation:
+            if _index is not None:
+                # The database changed; cached answers may be stale
+                _geocode_city.cache_clear()
+                _geocode_ip.cache_clear()
+            _index = _CityIndex(get_all_city_coordinates())
+            _index_generation = generation
+        return _index
+
+
+@lru_cache(maxsize=4096)
+def _geocode_city(city: str, state: str) -> Optional[Tuple[float, float]]:
+    row = _city_index().city(city, state)
+    if row is None:
+        return None
+    return row['latitude'], row['longitude']
+
+
+@lru_cache(maxsize=4096)
+def _geocode_ip(ip: str) -> Optional[Tuple[float, float]]:
+    from src.database.db_utils import city_for_ip
+
+    city = city_for_ip(ip)
+    if city is None or city['latitude'] is None:
+        return None
+    return city['latitude'], city['longitude']
+
+
+def geocode_city(city: str, state: str) -> Optional[Tuple[float, float]]:
+    """
+    Coordinates of a city from the local database, or None.
+
+    Matches the city name exactly (after normalizing case and punctuation)
+    and then fuzzily, within a state given by name or abbreviation.
+    """
+    _city_index()  # Drops cached answers if the database changed
+    return _geocode_city(city, state)
+
+
+def geocode_ip(ip: str) -> Optional[Tuple[float, float]]:
+    """Coordinates of the city an IP address belongs to, or None"""
+    _city_index()
+    return _geocode_ip(ip)
+
+
+def clear_cache() -> None:
+    """Forget cached lookups and reload the city table on next use"""
+    global _index
+    with _index_lock:
+        _index = None
+    _geocode_city.cache_clear()
+    _geocode_ip.cache_clear()
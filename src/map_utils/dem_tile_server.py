@@ -0,0 +1,329 @@
+import io
+import math
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from src.map_utils.mbtiles import MBTilesCache
+
+TILE_SIZE = 256
+
+# Colormap and fixed value range per layer. The range is fixed (not per tile)
+# so neighbouring tiles use the same colours and no seams appear.
+LAYER_STYLES = {
+    'elevation': ('terrain', -100.0, 4000.0),
+    'hillshade': ('gray', 0.0, 255.0),
+    'slope': ('magma', 0.0, 60.0),
+}
+
+# Below this zoom a tile spans too many 1x1 degree DEM files to render on
+# demand; above the max the DEM has no more detail to show
+DEFAULT_MIN_ZOOM = int(os.getenv('DEM_TILE_MIN_ZOOM', '7'))
+DEFAULT_MAX_ZOOM = int(os.getenv('DEM_TILE_MAX_ZOOM', '16'))
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    'DEM_TILE_CACHE_DIR',
+    Path(__file__).parent.parent.parent / 'data' / 'tile_cache'
+))
+# Size cap for each layer's cache; least recently used tiles are evicted
+DEFAULT_CACHE_MAX_BYTES = int(float(os.getenv('DEM_TILE_CACHE_MAX_MB', '256')) * 1024 * 1024)
+DEFAULT_PORT = int(os.getenv('DEM_TILE_PORT', '8765'))
+
+TILE_PATH = re.compile(r'^/tiles/(?P<layer>\w+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.png$')
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """
+    Get the lat/lon bounds of an XYZ (Web Mercator) tile.
+
+    Returns:
+        Bounds: Object containing left, bottom, right and top in degrees
+    """
+    from src.data_sources.file_parseing import Bounds
+
+    n = 1 << z
+    left = x / n * 360.0 - 180.0
+    right = (x + 1) / n * 360.0 - 180.0
+    top = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    bottom = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return Bounds(left=left, bottom=bottom, right=right, top=top)
+
+
+def valid_tile(z: int, x: int, y: int, min_zoom: int = DEFAULT_MIN_ZOOM, max_zoom: int = DEFAULT_MAX_ZOOM) -> bool:
+    """True if z is within the served zoom range and x, y are on that zoom's grid"""
+    return min_zoom <= z <= max_zoom and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+def _mercator_row_index(z: int, y: int, bounds, tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Map each output row of a Mercator tile to a row of a lat-linear grid
+    covering the same bounds (nearest neighbour).
+    """
+    n = 1 << z
+    merc_y = (y + (np.arange(tile_size) + 0.5) / tile_size) / n
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * merc_y))))
+    res = (bounds.top - bounds.bottom) / tile_size
+    rows = np.floor((bounds.top - lats) / res).astype(np.int64)
+    return np.clip(rows, 0, tile_size - 1)
+
+
+def colorize(values: np.ndarray, layer: str) -> np.ndarray:
+    """Convert a layer's values to an RGBA uint8 image; NaN becomes transparent"""
+    from matplotlib import colormaps
+
+    cmap_name, vmin, vmax = LAYER_STYLES[layer]
+    normed = np.clip((values - vmin) / (vmax - vmin), 0.0, 1.0)
+    rgba = colormaps[cmap_name](np.nan_to_num(normed), bytes=True)
+    rgba[np.isnan(values), 3] = 0
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an RGBA array as PNG bytes"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def empty_tile(tile_size: int = TILE_SIZE) -> bytes:
+    """Fully transparent tile"""
+    return encode_png(np.zeros((tile_size, tile_size, 4), dtype=np.uint8))
+
+
+def render_tile(input_dir: Union[str, Path], layer: str, z: int, x: int, y: int,
+                min_zoom: int = DEFAULT_MIN_ZOOM) -> bytes:
+    """
+    Render one 256px XYZ tile of a DEM layer as PNG.
+
+    The region is read from the 1x1 degree tile set with a one pixel halo so
+    hillshade and slope are continuous across tile edges, computed on a
+    lat-linear grid and then resampled row-wise to Web Mercator.
+
+    Args:
+        input_dir: Directory containing the 1x1 degree TIFF tiles
+        layer: One of 'elevation', 'hillshade' or 'slope'
+        z, x, y: XYZ tile coordinates
+        min_zoom: Tiles below this zoom are returned empty
+
+    Returns:
+        PNG encoded tile
+    """
+    from src.topography.terrain_derivatives import compute_terrain_derivatives, load_dem_with_halo
+
+    if layer not in LAYER_STYLES:
+        raise ValueError(f"Unknown layer: {layer}. Available layers: {', '.join(LAYER_STYLES)}")
+    if z < min_zoom:
+        return empty_tile()
+
+    bounds = tile_bounds(z, x, y)
+    padded = load_dem_with_halo(input_dir, bounds, (TILE_SIZE, TILE_SIZE), halo=1)
+    if padded is None or np.isnan(padded).all():
+        return empty_tile()
+
+    data = padded[1:-1, 1:-1]
+    if layer == 'elevation':
+        values = data
+    else:
+        values = compute_terrain_derivatives(data, bounds, products=(layer,), halo=padded)[layer]
+
+    values = np.take(values, _mercator_row_index(z, y, bounds), axis=0)
+    return encode_png(colorize(values, layer))
+
+
+class TileLayers:
+    """XYZ URL templates for the DEM layers of a tile server at ``public_url``."""
+
+    def __init__(self, public_url: str):
+        self.public_url = public_url.rstrip('/')
+
+    def url_template(self, layer: str) -> str:
+        """XYZ URL template for a layer, as used by folium/Leaflet"""
+        return f"{self.public_url}/tiles/{layer}/{{z}}/{{x}}/{{y}}.png"
+
+    def layer_urls(self) -> Dict[str, str]:
+        """URL templates for every layer, keyed by display name"""
+        return {f"DEM {layer.title()}": self.url_template(layer) for layer in LAYER_STYLES}
+
+
+class DemTileServer(TileLayers):
+    """Serves rendered DEM layers as XYZ tiles over HTTP, cached in MBTiles files."""
+
+    def __init__(
+        self,
+        input_dir: Union[str, Path],
+        host: str = '127.0.0.1',
+        port: int = 0,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        public_url: Optional[str] = None,
+        min_zoom: int = DEFAULT_MIN_ZOOM,
+        max_zoom: int = DEFAULT_MAX_ZOOM,
+        cache_max_bytes: Optional[int] = DEFAULT_CACHE_MAX_BYTES
+    ):
+        """
+        Initialize the tile server.
+
+        Args:
+            input_dir: Directory containing the 1x1 degree TIFF tiles
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            cache_dir: Directory for the per-layer .mbtiles caches
+            public_url: Base URL the browser uses to reach the server, e.g.
+                when it sits behind the nginx proxy. Defaults to
+                DEM_TILE_PUBLIC_URL or http://host:port.
+            min_zoom, max_zoom: Zoom range served; other tiles get a 404
+            cache_max_bytes: Size cap for each layer's cache (None for no cap)
+        """
+        self.input_dir = Path(input_dir)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.caches = {
+            layer: MBTilesCache(
+                Path(cache_dir) / f"dem_{layer}.mbtiles",
+                metadata={'name': f"dem_{layer}", 'format': 'png', 'type': 'overlay'},
+                max_bytes=cache_max_bytes
+            )
+            for layer in LAYER_STYLES
+        }
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        bound_host, bound_port = self.httpd.server_address[:2]
+        super().__init__(
+            public_url
+            or os.getenv('DEM_TILE_PUBLIC_URL')
+            or f"http://{bound_host}:{bound_port}"
+        )
+        self._thread = None
+
+    def valid_tile(self, z: int, x: int, y: int) -> bool:
+        return valid_tile(z, x, y, self.min_zoom, self.max_zoom)
+
+    def get_tile(self, layer: str, z: int, x: int, y: int) -> bytes:
+        """
+        Get a tile from the cache, rendering and storing it on a miss.
+
+        Raises:
+            ValueError: The tile is outside the served zoom range or grid
+        """
+        if not self.valid_tile(z, x, y):
+            raise ValueError(f"Tile {z}/{x}/{y} is not served")
+        cache = self.caches[layer]
+        tile = cache.get(z, x, y)
+        if tile is None:
+            tile = render_tile(self.input_dir, layer, z, x, y, min_zoom=self.min_zoom)
+            cache.put(z, x, y, tile)
+        return tile
+
+    def _make_handler(self):
+        server = self
+
+        class TileHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = TILE_PATH.match(self.path.split('?', 1)[0])
+                if not match or match['layer'] not in LAYER_STYLES:
+                    self.send_error(404)
+                    return
+                z, x, y = int(match['z']), int(match['x']), int(match['y'])
+                # Arbitrary coordinates would each cost a render and a cache row
+                if not server.valid_tile(z, x, y):
+                    self.send_error(404)
+                    return
+                try:
+                    tile = server.get_tile(match['layer'], z, x, y)
+                except Exception as e:
+                    print(f"Error rendering tile {self.path}: {str(e)}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(tile)))
+                self.send_header('Cache-Control', 'public, max-age=86400')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(tile)
+
+            def log_message(self, format, *args):
+                pass
+
+        return TileHandler
+
+    def start(self) -> 'DemTileServer':
+        """Start serving in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread = None
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def _port_in_use(host: str, port: int) -> bool:
+    import socket
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex((host, port)) == 0
+
+
+def get_tile_server(input_dir: Union[str, Path]) -> TileLayers:
+    """
+    Get the DEM tile server for this process, starting it on first use.
+
+    When DEM_TILE_PUBLIC_URL is set the tiles come from an external server
+    (the sidecar below, behind nginx) and nothing is bound here. Otherwise
+    the server binds DEM_TILE_PORT (default 8765); if that port is already
+    served, by a sidecar or another app process, that server is reused.
+
+    Raises:
+        OSError: The port is taken by something that does not accept connections
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            public_url = os.getenv('DEM_TILE_PUBLIC_URL')
+            if public_url:
+                _server = TileLayers(public_url)
+            else:
+                try:
+                    _server = DemTileServer(input_dir, port=DEFAULT_PORT).start()
+                except OSError:
+                    if not _port_in_use('127.0.0.1', DEFAULT_PORT):
+                        raise
+                    _server = TileLayers(f"http://127.0.0.1:{DEFAULT_PORT}")
+        return _server
+
+
+if __name__ == "__main__":
+    # Run as a sidecar: python -m src.map_utils.dem_tile_server --input-dir ~/s3bucket
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve DEM layers as XYZ tiles")
+    parser.add_argument('--input-dir', required=True, help="Directory containing the 1x1 degree TIFF tiles")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_CACHE_MAX_BYTES / 1024 / 1024,
+                        help="Size cap for each layer's cache")
+    args = parser.parse_args()
+
+    tile_server = DemTileServer(
+        Path(args.input_dir).expanduser(),
+        host=args.host,
+        port=args.port,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=int(args.cache_max_mb * 1024 * 1024)
+    )
+    print(f"Serving DEM tiles at {tile_server.public_url}/tiles/<layer>/<z>/<x>/<y>.png")
+    tile_server.httpd.serve_forever()
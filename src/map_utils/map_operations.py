@@ -1,19 +1,43 @@
 import folium
-import geocoder
 from typing import Tuple, Optional, Dict, Any
 from src.get_coords.point_to_bounds import get_bounds_from_point
 from src.get_coords.calculate_zoom import calculate_zoom_level
+from src.get_coords.offline_geocoder import geocode_city, geocode_ip
 
 def create_map(
     lat: float,
     lon: float,
     zoom: int,
+    tile_layers: Optional[Dict[str, str]] = None,
 ) -> folium.Map:
-    """Create a folium map with the given parameters"""
+    """
+    Create a folium map with the given parameters
+
+    Args:
+        lat: Center latitude
+        lon: Center longitude
+        zoom: Initial zoom level
+        tile_layers: Optional overlay layers as {display name: XYZ URL template},
+            e.g. from DemTileServer.layer_urls(). The first one is shown by default.
+    """
     m = folium.Map(
         location=[lat, lon],
         zoom_start=zoom
     )
+
+    if tile_layers:
+        for idx, (name, url) in enumerate(tile_layers.items()):
+            folium.TileLayer(
+                tiles=url,
+                attr='DEM: European Space Agency',
+                name=name,
+                overlay=True,
+                control=True,
+                show=idx == 0,
+                opacity=0.6,
+                tile_size=256
+            ).add_to(m)
+        folium.LayerControl().add_to(m)
     
     # Add markers and other map elements here
     # if city and state:
@@ -35,15 +59,36 @@ def create_map(
     
     return m
 
-def get_location_from_ip() -> Tuple[float, float]:
-    """Get the current location based on IP address"""
-    g = geocoder.ip('me')
+def get_location_from_ip(ip: Optional[str] = None) -> Tuple[float, float]:
+    """
+    Get a location based on IP address
+
+    A given address is looked up in the local IP table first; the geocoder
+    service is only asked on a miss, or for this machine's own address.
+    """
+    if ip:
+        location = geocode_ip(ip)
+        if location is not None:
+            return location
+
+    import geocoder
+    g = geocoder.ip(ip or 'me')
     if not g.ok:
         raise ValueError("Could not get location from IP")
     return g.lat, g.lng
 
 def get_location_from_city(city: str, state: str) -> Tuple[float, float]:
-    """Get coordinates for a given city and state"""
+    """
+    Get coordinates for a given city and state
+
+    Served from the local city table (exact, then fuzzy match); Nominatim is
+    only queried for places the database does not have.
+    """
+    location = geocode_city(city, state)
+    if location is not None:
+        return location
+
+    import geocoder
     location = geocoder.osm(
         f"{city}, {state}, USA",
         headers={'User-Agent': 'urbexfun/1.0'},
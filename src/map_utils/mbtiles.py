@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+METADATA_SQL = "CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)"
+
+# Check the total size every this many writes rather than on every put
+EVICT_CHECK_INTERVAL = 64
+# Write access times of cache hits in batches of this many
+ACCESS_FLUSH_INTERVAL = 256
+
+
+def tms_row(z: int, y: int) -> int:
+    """MBTiles stores rows in TMS order (south first); flip an XYZ row"""
+    return (1 << z) - 1 - y
+
+
+class MBTilesFile:
+    """
+    Shared plumbing for tile stores in the MBTiles layout.
+
+    - Each thread, and each process after a fork, opens its own connection
+      in WAL mode with a busy timeout, so one file can be shared by the
+      Streamlit server, render workers and batch jobs at the same time.
+    - With ``max_bytes`` set, the least recently used tiles are evicted once
+      the stored bytes exceed it. Hits only record their access time in
+      memory; times are written in one batch with the next put, every
+      ACCESS_FLUSH_INTERVAL hits, or before eviction, so readers in several
+      processes do not contend for the write lock.
+
+    Subclasses name the columns that identify a tile in ``key_columns``; the
+    tiles table needs ``size`` and ``accessed_at`` columns for eviction.
+    """
+
+    key_columns: Tuple[str, ...] = ('zoom_level', 'tile_column', 'tile_row')
+
+    def __init__(self, path: Union[str, Path], max_bytes: Optional[int] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._accessed = {}
+        self._accessed_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # Connections must not cross a fork, so reopen in a new process
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create(self, statements, metadata: Optional[Dict[str, str]] = None, replace_metadata: bool = True) -> None:
+        """Create the metadata table plus the given tiles schema, and write metadata"""
+        conn = self._connection()
+        verb = "INSERT OR REPLACE" if replace_metadata else "INSERT OR IGNORE"
+        with conn:
+            conn.execute(METADATA_SQL)
+            for statement in statements:
+                conn.execute(statement)
+            for name, value in (metadata or {}).items():
+                conn.execute(f"{verb} INTO metadata (name, value) VALUES (?, ?)", (name, str(value)))
+
+    @property
+    def _key_where(self) -> str:
+        return ' AND '.join(f"{column} = ?" for column in self.key_columns)
+
+    def _touch(self, key: Tuple) -> None:
+        """Remember that a tile was read; written later by flush_access_times"""
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+            flush = len(self._accessed) >= ACCESS_FLUSH_INTERVAL
+        if flush:
+            self.flush_access_times()
+
+    def flush_access_times(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Write pending access times from cache hits. Runs inside the caller's
+        transaction when conn is given, otherwise in its own.
+        """
+        with self._accessed_lock:
+            pending, self._accessed = self._accessed, {}
+        if not pending:
+            return
+        params = [(accessed_at,) + key for key, accessed_at in pending.items()]
+        sql = f"UPDATE tiles SET accessed_at = MAX(COALESCE(accessed_at, 0), ?) WHERE {self._key_where}"
+        if conn is not None:
+            conn.executemany(sql, params)
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(sql, params)
+
+    def _after_write(self) -> None:
+        self._writes += 1
+        if self.max_bytes is not None and self._writes % EVICT_CHECK_INTERVAL == 0:
+            self.evict()
+
+    def total_bytes(self) -> int:
+        row = self._connection().execute(
+            "SELECT COALESCE(SUM(COALESCE(size, LENGTH(tile_data))), 0) FROM tiles"
+        ).fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        """
+        Delete least recently used tiles until the cache is below 90% of its cap.
+
+        Returns:
+            Number of tiles removed
+        """
+        if self.max_bytes is None:
+            return 0
+        self.flush_access_times()
+        conn = self._connection()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        excess = total - int(self.max_bytes * 0.9)
+
+        with conn:
+            rows = conn.execute(
+                "SELECT rowid, COALESCE(size, LENGTH(tile_data)) FROM tiles ORDER BY accessed_at"
+            ).fetchall()
+            doomed = []
+            for rowid, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((rowid,))
+                excess -= size
+            conn.executemany("DELETE FROM tiles WHERE rowid = ?", doomed)
+        return len(doomed)
+
+
+class MBTilesCache(MBTilesFile):
+    """
+    Tile store in the MBTiles layout (SQLite with metadata and tiles tables).
+
+    Rows are stored in TMS order as the MBTiles spec requires; callers use
+    XYZ (slippy map) coordinates. The extra size and accessed_at columns
+    drive LRU eviction when ``max_bytes`` is set.
+    """
+
+    def __init__(self, path: Union[str, Path], metadata: Optional[Dict[str, str]] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Open or create an MBTiles file.
+
+        Args:
+            path: Location of the .mbtiles file
+            metadata: Values for the metadata table (name, format, ...)
+            max_bytes: Size cap for stored tile data (None for no cap)
+        """
+        super().__init__(path, max_bytes)
+        self._create([
+            """
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                size INTEGER,
+                accessed_at REAL
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index
+            ON tiles (zoom_level, tile_column, tile_row)
+            """,
+        ], metadata)
+
+        # Files created before eviction existed lack the bookkeeping columns
+        conn = self._connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tiles)")}
+        with conn:
+            for column, kind in (('size', 'INTEGER'), ('accessed_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE tiles ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS tile_lru ON tiles (accessed_at)")
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """Get the stored tile for XYZ coordinates, or None"""
+        key = (z, x, tms_row(z, y))
+        row = self._connection().execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        if self.max_bytes is not None:
+            self._touch(key)
+        return row[0]
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        """Store a tile for XYZ coordinates"""
+        conn = self._connection()
+        with conn:
+            self.flush_access_times(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data, size, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (z, x, tms_row(z, y), sqlite3.Binary(data), len(data), time.time())
+            )
+        self._after_write()
@@ -3,7 +3,29 @@ import requests
 import numpy as np
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import threading
 import time
+from typing import NamedTuple, Optional, Tuple
+from src.satellite.tile_cache import get_tile_cache
+
+TILE_URL = 'https://mt.google.com/vt/lyrs=s&x={x}&y={y}&z={z}'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.82 Safari/537.36'
+}
+
+# Zoom selection limits. The pixel budget bounds the mosaic size (~48 MB as
+# RGB) and MAX_TILES is a hard cap on requests per image, whatever the bounds.
+MIN_ZOOM = 1
+MAX_ZOOM = 20
+DEFAULT_PIXEL_BUDGET = 16_000_000
+MAX_TILES = 1024
+OVERVIEW_WIDTH = 1024
+
+# Upper bound on simultaneous requests to one tile host, shared by every
+# caller in the process (all Streamlit sessions), and the connection pool size
+MAX_CONNECTIONS_PER_HOST = 8
 
 
 def project_with_scale(lat, lon, scale):
@@ -14,103 +36,456 @@ def project_with_scale(lat, lon, scale):
     y = scale * (0.5 - np.log((1 + siny) / (1 - siny)) / (4 * np.pi))
     return x, y
 
-def create_session_with_retries():
-    """Create a requests session with retry strategy"""
+def create_session_with_retries(pool_size=MAX_CONNECTIONS_PER_HOST):
+    """Create a requests session with retry strategy and a keep-alive connection pool"""
     session = requests.Session()
     retries = Retry(
         total=5,  # number of retries
         backoff_factor=0.1,  # time factor between retries
         status_forcelist=[500, 502, 503, 504],  # HTTP status codes to retry on
     )
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     return session
 
-def download_tile(url, headers, channels):
-    """Download a single map tile with retries"""
-    session = create_session_with_retries()
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+
+def get_session():
+    """Get the shared tile session so connections are reused across tiles and requests"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session_with_retries()
+        return _session
+
+def _host_slot(url):
+    """Semaphore limiting concurrent requests to the url's host"""
+    host = urlsplit(url).netloc
+    with _session_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        return _host_slots[host]
+
+def fetch_tile_bytes(url, headers, session=None, cache=None, tile_key=None, cached=None):
+    """
+    Get the encoded bytes of a tile, consulting the tile cache first.
+
+    A fresh cached tile is returned without touching the network. A stale one
+    is revalidated with If-None-Match / If-Modified-Since; on 304 the cached
+    bytes are reused, and if the network fails they are served anyway.
+
+    Args:
+        url: Tile URL
+        headers: Request headers
+        session: requests session (defaults to the shared one)
+        cache: Optional TileCache
+        tile_key: (layer, z, x, y) key in the cache
+        cached: CachedTile already looked up by the caller, if any
+    """
+    if cache is not None and cached is None:
+        cached = cache.get(*tile_key)
+    if cached is not None and cached.fresh:
+        return cached.data
+
+    session = session or get_session()
+    request_headers = dict(headers)
+    if cached is not None:
+        if cached.etag:
+            request_headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            request_headers['If-Modified-Since'] = cached.last_modified
+
     max_attempts = 2
-    
     for attempt in range(max_attempts):
         try:
-            response = session.get(url, headers=headers, timeout=10)
+            with _host_slot(url):
+                response = session.get(url, headers=request_headers, timeout=10)
+            if response.status_code == 304 and cached is not None:
+                cache.mark_revalidated(*tile_key)
+                return cached.data
             response.raise_for_status()  # Raise an error for bad status codes
-            arr = np.asarray(bytearray(response.content), dtype=np.uint8)
-            return cv2.imdecode(arr, 1) if channels == 3 else cv2.imdecode(arr, -1)
+            if cache is not None:
+                cache.put(
+                    *tile_key,
+                    response.content,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+            return response.content
         except Exception as e:
             if attempt == max_attempts - 1:  # Last attempt
-                return None
+                print(f"Error downloading tile {url}: {str(e)}")
+                return cached.data if cached is not None else None
             time.sleep(1)  # Wait before retrying
 
-def get_satellite_image(lat1, lon1, lat2, lon2, zoom=12, progress_callback=None): 
-    """Get satellite imagery for the specified bounds"""
-    
-    # Ensure correct coordinate ordering
-    min_lat, max_lat = min(lat1, lat2), max(lat1, lat2)
-    min_lon, max_lon = min(lon1, lon2), max(lon1, lon2)
-    
-    # Configuration
-    tile_size = 256
-    channels = 3
-    url = 'https://mt.google.com/vt/lyrs=s&x={x}&y={y}&z={z}'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.82 Safari/537.36'
-    }
-    
+# OpenCV >= 4.10 can decode straight to RGB; older builds decode BGR and the
+# channel swap is folded into the copy into the mosaic (see decode_tile)
+IMREAD_COLOR_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+def _decode_into(buf, dst):
+    """
+    Decode an RGB tile straight into ``dst`` (a mosaic slice), or return None
+    if OpenCV could not write there.
+
+    OpenCV reuses ``dst`` only when the decoded size and type match it
+    exactly, and older Python bindings do not accept ``dst`` at all. Both
+    cases are detected (the result does not share ``dst``'s memory) and the
+    caller falls back to a decode plus one copy.
+    """
+    flags = IMREAD_COLOR_RGB if IMREAD_COLOR_RGB is not None else cv2.IMREAD_COLOR
+    try:
+        out = cv2.imdecode(buf, flags, dst=dst)
+    except (TypeError, cv2.error):
+        return None
+    if out is None or out.shape != dst.shape or not np.shares_memory(out, dst):
+        return None
+    if IMREAD_COLOR_RGB is None:
+        swapped = cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+        if not np.shares_memory(swapped, dst):
+            dst[...] = swapped
+    return dst
+
+def decode_tile(content, channels, dst=None):
+    """
+    Decode an encoded tile image to RGB(A).
+
+    The encoded bytes are wrapped with np.frombuffer (no copy). For RGB
+    tiles given a ``dst`` (the tile's slice of the mosaic), the pixels are
+    decoded straight into it and ``dst`` is returned, so the tile is never
+    allocated on its own. Otherwise, or if OpenCV cannot reuse ``dst`` (see
+    _decode_into), a new array is returned for the caller to copy in; when
+    OpenCV cannot decode to RGB directly that is a reversed-channel view, so
+    the swap happens during that single copy.
+    """
+    buf = np.frombuffer(content, dtype=np.uint8)
+    if channels == 3:
+        if dst is not None:
+            decoded = _decode_into(buf, dst)
+            if decoded is not None:
+                return decoded
+        if IMREAD_COLOR_RGB is not None:
+            return cv2.imdecode(buf, IMREAD_COLOR_RGB)
+        tile = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    else:
+        tile = cv2.imdecode(buf, cv2.IMREAD_UNCHANGED)
+        if tile is not None and tile.ndim == 3 and tile.shape[2] == 4:
+            return tile[..., [2, 1, 0, 3]]
+    return tile[..., ::-1] if tile is not None and tile.ndim == 3 else tile
+
+def downscale_for_display(image, max_width=1600):
+    """
+    Shrink an image to at most ``max_width`` pixels wide before it is encoded
+    for the browser. Uses area interpolation, which averages instead of aliasing.
+    """
+    height, width = image.shape[:2]
+    if width <= max_width:
+        return image
+    new_height = max(1, round(height * max_width / width))
+    return cv2.resize(image, (max_width, new_height), interpolation=cv2.INTER_AREA)
+
+def download_tile(url, headers, channels, session=None, cache=None, tile_key=None, cached=None, dst=None):
+    """
+    Download a single map tile with retries, using the tile cache when given.
+
+    With ``dst`` (the tile's slice of the mosaic) the tile is decoded into it
+    where possible; see decode_tile.
+    """
+    content = fetch_tile_bytes(url, headers, session=session, cache=cache, tile_key=tile_key, cached=cached)
+    if content is None:
+        return None
+    try:
+        return decode_tile(content, channels, dst=dst)
+    except Exception as e:
+        print(f"Error decoding tile {url}: {str(e)}")
+        return None
+
+def get_tile_grid(min_lat, max_lat, min_lon, max_lon, zoom, tile_size=256):
+    """
+    Calculate the pixel and tile extent of bounds at a zoom level.
+
+    Returns:
+        dict: Top-left pixel, image size and inclusive tile ranges
+    """
     scale = 1 << zoom
-    
+
     # Find pixel and tile coordinates
     tl_proj_x, tl_proj_y = project_with_scale(max_lat, min_lon, scale)  # Top-left uses max_lat
     br_proj_x, br_proj_y = project_with_scale(min_lat, max_lon, scale)  # Bottom-right uses min_lat
-    
+
     tl_pixel_x = int(tl_proj_x * tile_size)
     tl_pixel_y = int(tl_proj_y * tile_size)
     br_pixel_x = int(br_proj_x * tile_size)
     br_pixel_y = int(br_proj_y * tile_size)
-    
-    tl_tile_x = int(tl_proj_x)
-    tl_tile_y = int(tl_proj_y)
-    br_tile_x = int(br_proj_x)
-    br_tile_y = int(br_proj_y)
-    
+
+    return {
+        'tl_pixel_x': tl_pixel_x,
+        'tl_pixel_y': tl_pixel_y,
+        'img_w': abs(tl_pixel_x - br_pixel_x),
+        'img_h': br_pixel_y - tl_pixel_y,
+        'tl_tile_x': int(tl_proj_x),
+        'tl_tile_y': int(tl_proj_y),
+        'br_tile_x': int(br_proj_x),
+        'br_tile_y': int(br_proj_y),
+    }
+
+def count_tiles(grid):
+    """Number of tiles covered by a tile grid"""
+    return (grid['br_tile_x'] - grid['tl_tile_x'] + 1) * (grid['br_tile_y'] - grid['tl_tile_y'] + 1)
+
+def choose_zoom(min_lat, max_lat, min_lon, max_lon, pixel_budget=DEFAULT_PIXEL_BUDGET,
+                max_tiles=MAX_TILES, tile_size=256, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """
+    Pick the highest zoom whose mosaic fits the pixel budget and tile cap.
+
+    The extent is measured in Web Mercator with project_with_scale at scale 1
+    (fractions of the world), so it accounts for latitude stretching.
+
+    Args:
+        min_lat, max_lat, min_lon, max_lon: Bounds in degrees
+        pixel_budget: Maximum output pixels (width * height)
+        max_tiles: Maximum number of tiles to request
+        tile_size: Tile size in pixels
+        min_zoom, max_zoom: Allowed zoom range
+
+    Returns:
+        int: Zoom level
+
+    Raises:
+        ValueError: Even min_zoom needs more than max_tiles tiles
+    """
+    tl_x, tl_y = project_with_scale(max_lat, min_lon, 1)
+    br_x, br_y = project_with_scale(min_lat, max_lon, 1)
+    world_area = abs(br_x - tl_x) * abs(br_y - tl_y)
+
+    if world_area <= 0:
+        zoom = max_zoom
+    else:
+        # pixels(z) = world_area * (tile_size * 2**z) ** 2
+        zoom = int(np.floor(np.log2(np.sqrt(pixel_budget / world_area) / tile_size)))
+        zoom = max(min_zoom, min(max_zoom, zoom))
+
+    # Tile alignment can push the request count above the cap; step down until it fits
+    while count_tiles(get_tile_grid(min_lat, max_lat, min_lon, max_lon, zoom, tile_size)) > max_tiles:
+        if zoom <= min_zoom:
+            raise ValueError(f"Bounds are too large: more than {max_tiles} tiles even at zoom {min_zoom}")
+        zoom -= 1
+    return zoom
+
+def tile_slot(img, tile_x, tile_y, grid, tile_size=256):
+    """
+    The mosaic slice a tile fills completely, as (view, rect), or None for
+    edge tiles that are cropped (those are decoded separately and placed
+    with place_tile).
+    """
+    img_h, img_w = img.shape[:2]
+    x = tile_x * tile_size - grid['tl_pixel_x']
+    y = tile_y * tile_size - grid['tl_pixel_y']
+    if x < 0 or y < 0 or x + tile_size > img_w or y + tile_size > img_h:
+        return None
+    return img[y:y + tile_size, x:x + tile_size], (x, y, tile_size, tile_size)
+
+def place_tile(img, tile, tile_x, tile_y, grid, tile_size=256):
+    """
+    Copy the visible part of a tile into the mosaic.
+
+    Returns:
+        tuple: (x, y, w, h) rectangle of the mosaic that was written
+    """
+    img_h, img_w = img.shape[:2]
+
+    # Calculate tile placement
+    tl_rel_x = tile_x * tile_size - grid['tl_pixel_x']
+    tl_rel_y = tile_y * tile_size - grid['tl_pixel_y']
+    br_rel_x = tl_rel_x + tile_size
+    br_rel_y = tl_rel_y + tile_size
+
+    # Interior tiles are copied whole; only edge tiles need cropping
+    if tl_rel_x >= 0 and tl_rel_y >= 0 and br_rel_x <= img_w and br_rel_y <= img_h:
+        img[tl_rel_y:br_rel_y, tl_rel_x:br_rel_x] = tile
+        return tl_rel_x, tl_rel_y, tile_size, tile_size
+
+    # Define placement bounds
+    img_x_l = max(0, tl_rel_x)
+    img_x_r = min(img_w + 1, br_rel_x)
+    img_y_l = max(0, tl_rel_y)
+    img_y_r = min(img_h + 1, br_rel_y)
+
+    # Define crop bounds
+    cr_x_l = max(0, -tl_rel_x)
+    cr_x_r = tile_size + min(0, img_w - br_rel_x)
+    cr_y_l = max(0, -tl_rel_y)
+    cr_y_r = tile_size + min(0, img_h - br_rel_y)
+
+    # Place tile in image
+    img[img_y_l:img_y_r, img_x_l:img_x_r] = tile[cr_y_l:cr_y_r, cr_x_l:cr_x_r]
+    return img_x_l, img_y_l, min(img_w, img_x_r) - img_x_l, min(img_h, img_y_r) - img_y_l
+
+class MosaicUpdate(NamedTuple):
+    """One step of a streaming mosaic: the rectangle just written and the partial image."""
+    rect: Optional[Tuple[int, int, int, int]]  # (x, y, w, h), None if the tile failed
+    image: np.ndarray
+    done: int
+    total: int
+
+def iter_satellite_image(lat1, lon1, lat2, lon2, zoom=None,
+                         max_workers=MAX_CONNECTIONS_PER_HOST, url=TILE_URL, layer='satellite', cache=None,
+                         pixel_budget=DEFAULT_PIXEL_BUDGET, max_tiles=MAX_TILES, overview_zoom=False):
+    """
+    Stream satellite imagery for the specified bounds as tiles arrive.
+
+    Yields a MosaicUpdate after every tile. The mosaic is the same RGB array
+    each time, filled in progressively: cached tiles first, then downloads,
+    which are requested centre-out so the middle of the view appears first.
+    Closing the generator early cancels the downloads that have not started.
+
+    Args:
+        lat1, lon1, lat2, lon2: Corners of the bounds in any order
+        zoom: Tile zoom level; chosen from pixel_budget when None
+        max_workers: Number of tiles downloaded at the same time
+        url: Tile URL template with {x}, {y} and {z} placeholders
+        layer: Cache layer name for this tile source
+        cache: TileCache to use (defaults to the shared one; pass False to disable)
+        pixel_budget: Target output pixels when choosing the zoom
+        max_tiles: Hard cap on tiles per image
+        overview_zoom: Choose a low zoom for an overview no wider than OVERVIEW_WIDTH
+
+    Raises:
+        ValueError: The request needs more than max_tiles tiles
+    """
+
+    # Ensure correct coordinate ordering
+    min_lat, max_lat = min(lat1, lat2), max(lat1, lat2)
+    min_lon, max_lon = min(lon1, lon2), max(lon1, lon2)
+
+    # Configuration
+    tile_size = 256
+    channels = 3
+
+    if overview_zoom:
+        pixel_budget = min(pixel_budget, OVERVIEW_WIDTH * OVERVIEW_WIDTH)
+        zoom = None
+    if zoom is None:
+        zoom = choose_zoom(min_lat, max_lat, min_lon, max_lon, pixel_budget, max_tiles, tile_size)
+
+    grid = get_tile_grid(min_lat, max_lat, min_lon, max_lon, zoom, tile_size)
+    if count_tiles(grid) > max_tiles:
+        raise ValueError(f"Zoom {zoom} needs {count_tiles(grid)} tiles, more than the limit of {max_tiles}")
+
     # Create image array
-    img_w = abs(tl_pixel_x - br_pixel_x)
-    img_h = br_pixel_y - tl_pixel_y
-    img = np.zeros((img_h, img_w, channels), np.uint8)
-    
+    img = np.zeros((grid['img_h'], grid['img_w'], channels), np.uint8)
+
+    # Order tiles centre-out
+    center_x = (grid['tl_tile_x'] + grid['br_tile_x']) / 2
+    center_y = (grid['tl_tile_y'] + grid['br_tile_y']) / 2
+    tiles = sorted(
+        (
+            (tile_x, tile_y)
+            for tile_y in range(grid['tl_tile_y'], grid['br_tile_y'] + 1)
+            for tile_x in range(grid['tl_tile_x'], grid['br_tile_x'] + 1)
+        ),
+        key=lambda t: (t[0] - center_x) ** 2 + (t[1] - center_y) ** 2
+    )
+
     # Calculate total tiles for progress tracking
-    total_tiles = (br_tile_x - tl_tile_x + 1) * (br_tile_y - tl_tile_y + 1)
+    total_tiles = len(tiles)
     tiles_processed = 0
-    
-    # Download and stitch tiles
-    for tile_y in range(tl_tile_y, br_tile_y + 1):
-        for tile_x in range(tl_tile_x, br_tile_x + 1):
-            tile = download_tile(url.format(x=tile_x, y=tile_y, z=zoom), headers, channels)
-            
+
+    session = get_session()
+    if cache is None:
+        cache = get_tile_cache()
+    cache = cache or None
+
+    # Stitch fresh cached tiles first; only misses and stale tiles go to the network
+    to_fetch = []
+    for tile_x, tile_y in tiles:
+        cached = cache.get(layer, zoom, tile_x, tile_y) if cache else None
+        if cached is not None and cached.fresh:
+            slot = tile_slot(img, tile_x, tile_y, grid, tile_size)
+            tile = decode_tile(cached.data, channels, dst=slot[0] if slot else None)
             if tile is not None:
-                # Calculate tile placement
-                tl_rel_x = tile_x * tile_size - tl_pixel_x
-                tl_rel_y = tile_y * tile_size - tl_pixel_y
-                br_rel_x = tl_rel_x + tile_size
-                br_rel_y = tl_rel_y + tile_size
-                
-                # Define placement bounds
-                img_x_l = max(0, tl_rel_x)
-                img_x_r = min(img_w + 1, br_rel_x)
-                img_y_l = max(0, tl_rel_y)
-                img_y_r = min(img_h + 1, br_rel_y)
-                
-                # Define crop bounds
-                cr_x_l = max(0, -tl_rel_x)
-                cr_x_r = tile_size + min(0, img_w - br_rel_x)
-                cr_y_l = max(0, -tl_rel_y)
-                cr_y_r = tile_size + min(0, img_h - br_rel_y)
-                
-                # Place tile in image
-                img[img_y_l:img_y_r, img_x_l:img_x_r] = tile[cr_y_l:cr_y_r, cr_x_l:cr_x_r]
-            
-            # Update progress
+                if slot is not None and tile is slot[0]:
+                    rect = slot[1]  # Decoded in place
+                else:
+                    rect = place_tile(img, tile, tile_x, tile_y, grid, tile_size)
+                tiles_processed += 1
+                yield MosaicUpdate(rect, img, tiles_processed, total_tiles)
+                continue
+        to_fetch.append((tile_x, tile_y, cached))
+
+    # Download concurrently. Interior tiles are decoded by the workers
+    # straight into their own (disjoint) slice of the mosaic; edge tiles are
+    # stitched on this thread as each one completes
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='satellite')
+    try:
+        futures = {}
+        for tile_x, tile_y, cached in to_fetch:
+            slot = tile_slot(img, tile_x, tile_y, grid, tile_size)
+            future = executor.submit(
+                download_tile,
+                url.format(x=tile_x, y=tile_y, z=zoom),
+                HEADERS,
+                channels,
+                session,
+                cache,
+                (layer, zoom, tile_x, tile_y),
+                cached,
+                slot[0] if slot else None
+            )
+            futures[future] = (tile_x, tile_y, slot)
+        for future in as_completed(futures):
+            tile_x, tile_y, slot = futures[future]
+            tile = future.result()
+
+            rect = None
+            if tile is not None:
+                if slot is not None and tile is slot[0]:
+                    rect = slot[1]  # Decoded in place by the worker
+                else:
+                    rect = place_tile(img, tile, tile_x, tile_y, grid, tile_size)
+
             tiles_processed += 1
-            if progress_callback:
-                progress_callback(tiles_processed / total_tiles)
-    
-    return img
\ No newline at end of file
+            yield MosaicUpdate(rect, img, tiles_processed, total_tiles)
+    finally:
+        # Don't wait for queued downloads if the caller stopped listening
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def get_satellite_image(lat1, lon1, lat2, lon2, zoom=None, progress_callback=None,
+                        max_workers=MAX_CONNECTIONS_PER_HOST, url=TILE_URL, layer='satellite', cache=None,
+                        pixel_budget=DEFAULT_PIXEL_BUDGET, max_tiles=MAX_TILES, overview=False):
+    """
+    Get satellite imagery for the specified bounds as an RGB array
+
+    Blocking wrapper around iter_satellite_image. Fresh tiles come straight
+    from the persistent tile cache; the rest are fetched concurrently over
+    the shared keep-alive session.
+
+    Args:
+        lat1, lon1, lat2, lon2: Corners of the bounds in any order
+        zoom: Tile zoom level; chosen from pixel_budget when None
+        progress_callback: Called with the fraction of tiles done (from the calling thread)
+        max_workers: Number of tiles downloaded at the same time
+        url: Tile URL template with {x}, {y} and {z} placeholders
+        layer: Cache layer name for this tile source
+        cache: TileCache to use (defaults to the shared one; pass False to disable)
+        pixel_budget: Target output pixels when choosing the zoom
+        max_tiles: Hard cap on tiles per image
+        overview: Fetch a quick low-zoom overview no wider than OVERVIEW_WIDTH
+
+    Raises:
+        ValueError: The request needs more than max_tiles tiles
+    """
+    img = None
+    for update in iter_satellite_image(lat1, lon1, lat2, lon2, zoom=zoom, max_workers=max_workers,
+                                       url=url, layer=layer, cache=cache, pixel_budget=pixel_budget,
+                                       max_tiles=max_tiles, overview_zoom=overview):
+        img = update.image
+        # Update progress
+        if progress_callback:
+            progress_callback(update.done / update.total)
+
+    if overview and img is not None:
+        return downscale_for_display(img, OVERVIEW_WIDTH)
+    return img
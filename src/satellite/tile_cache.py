@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from src.map_utils.mbtiles import MBTilesFile, tms_row
+
+DEFAULT_CACHE_PATH = Path(os.getenv(
+    'SATELLITE_CACHE_PATH',
+    Path(__file__).parent.parent.parent / 'data' / 'tile_cache' / 'satellite.mbtiles'
+))
+DEFAULT_MAX_BYTES = int(float(os.getenv('SATELLITE_CACHE_MAX_MB', '512')) * 1024 * 1024)
+DEFAULT_TTL_SECONDS = float(os.getenv('SATELLITE_CACHE_TTL_HOURS', '168')) * 3600
+
+
+@dataclass
+class CachedTile:
+    """A tile read from the cache."""
+    data: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+class TileCache(MBTilesFile):
+    """
+    Persistent tile cache keyed by (layer, z, x, y) in an MBTiles-style SQLite file.
+
+    - Entries older than the TTL are returned as stale so the caller can
+      revalidate them with their ETag / Last-Modified.
+    - When the stored bytes exceed ``max_bytes`` the least recently used
+      tiles are evicted (see MBTilesFile; hits are recorded without a write).
+    """
+
+    key_columns = ('layer', 'zoom_level', 'tile_column', 'tile_row')
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        """
+        Open or create the cache.
+
+        Args:
+            path: Location of the cache file
+            max_bytes: Size cap for stored tile data
+            ttl_seconds: Age after which a tile must be revalidated
+        """
+        super().__init__(path, max_bytes)
+        self.ttl_seconds = ttl_seconds
+
+        self._create([
+            """
+            CREATE TABLE IF NOT EXISTS tiles (
+                layer TEXT NOT NULL,
+                zoom_level INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row INTEGER NOT NULL,
+                tile_data BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index
+            ON tiles (layer, zoom_level, tile_column, tile_row)
+            """,
+            "CREATE INDEX IF NOT EXISTS tile_lru ON tiles (accessed_at)",
+        ], {'format': 'jpg'}, replace_metadata=False)
+
+    def get(self, layer: str, z: int, x: int, y: int) -> Optional[CachedTile]:
+        """Get a tile (fresh or stale) and mark it as recently used, or None on a miss"""
+        key = (layer, z, x, tms_row(z, y))
+        row = self._connection().execute("""
+            SELECT tile_data, etag, last_modified, fetched_at
+            FROM tiles
+            WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+        """, key).fetchone()
+        if row is None:
+            return None
+
+        self._touch(key)
+        data, etag, last_modified, fetched_at = row
+        return CachedTile(data, etag, last_modified, fresh=time.time() - fetched_at < self.ttl_seconds)
+
+    def put(self, layer: str, z: int, x: int, y: int, data: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a freshly downloaded tile"""
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            self.flush_access_times(conn)
+            conn.execute("""
+                INSERT OR REPLACE INTO tiles
+                    (layer, zoom_level, tile_column, tile_row, tile_data, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (layer, z, x, tms_row(z, y), sqlite3.Binary(data), etag, last_modified, now, now, len(data)))
+
+        self._after_write()
+
+    def mark_revalidated(self, layer: str, z: int, x: int, y: int) -> None:
+        """Reset the age of a tile after the server answered 304 Not Modified"""
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute("""
+                UPDATE tiles SET fetched_at = ?, accessed_at = ?
+                WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+            """, (now, now, layer, z, x, tms_row(z, y)))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tile_cache() -> TileCache:
+    """Get the process-wide satellite tile cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TileCache()
+        return _cache
@@ -0,0 +1,157 @@
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from src.topography.point_sampling import sample_elevations
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111_320.0
+DEFAULT_RADIUS_M = 2000.0
+# About one sample per pixel of the 1 arc-second DEM
+SAMPLE_SPACING_M = 30.0
+MAX_POINTS_PER_BATCH = 1_000_000
+
+
+def tile_name(lat: float, lon: float) -> str:
+    """Name of the 1x1 degree DEM tile containing a point"""
+    x, y = math.floor(lon), math.floor(lat)
+    return f"xmin{x}_xmax{x+1}_ymin{y}_ymax{y+1}.tif"
+
+
+def disc_offsets(radius_m: float, spacing_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """North and east offsets in meters of a square grid of points clipped to a disc"""
+    steps = np.arange(-radius_m, radius_m + spacing_m / 2, spacing_m)
+    dy, dx = np.meshgrid(steps, steps, indexing='ij')
+    inside = dx ** 2 + dy ** 2 <= radius_m ** 2
+    return dy[inside], dx[inside]
+
+
+def _batch_stats(cities: List[Dict], dy: np.ndarray, dx: np.ndarray, input_dir: Path,
+                 datasets: Dict) -> Iterator[Dict]:
+    """Sample the discs of a batch of cities in one call and summarise each row"""
+    lat = np.array([city['latitude'] for city in cities], dtype=np.float64)
+    lon = np.array([city['longitude'] for city in cities], dtype=np.float64)
+    cos_lat = np.maximum(np.cos(np.radians(lat)), 0.01)
+
+    # One row of disc points per city
+    lats = lat[:, None] + dy[None, :] / METERS_PER_DEGREE
+    lons = lon[:, None] + dx[None, :] / (METERS_PER_DEGREE * cos_lat[:, None])
+    values = sample_elevations(lats, lons, method='nearest', input_dir=input_dir, datasets=datasets)
+    centres = sample_elevations(lat, lon, method='bilinear', input_dir=input_dir, datasets=datasets)
+
+    valid = np.isfinite(values)
+    counts = valid.sum(axis=1)
+    minimum = np.where(valid, values, np.inf).min(axis=1)
+    maximum = np.where(valid, values, -np.inf).max(axis=1)
+    mean = np.where(valid, values, 0).sum(axis=1, dtype=np.float64) / np.maximum(counts, 1)
+
+    for i, city in enumerate(cities):
+        if counts[i] == 0:
+            continue
+        centre = centres[i]
+        if not np.isfinite(centre):
+            centre = np.median(values[i][valid[i]])
+        yield {
+            'city_id': city['city_id'],
+            'elevation_m': float(centre),
+            'min_m': float(minimum[i]),
+            'max_m': float(maximum[i]),
+            'mean_m': float(mean[i]),
+            'relief_m': float(maximum[i] - minimum[i]),
+            'sample_count': int(counts[i]),
+        }
+
+
+def disc_tiles(lat: float, lon: float, radius_m: float) -> List[str]:
+    """Names of every 1x1 degree tile the disc of radius_m around a point touches"""
+    lat_radius = radius_m / METERS_PER_DEGREE
+    lon_radius = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return [
+        tile_name(y, x)
+        for y in range(math.floor(lat - lat_radius), math.floor(lat + lat_radius) + 1)
+        for x in range(math.floor(lon - lon_radius), math.floor(lon + lon_radius) + 1)
+    ]
+
+
+def group_by_tiles(cities: Iterable[Dict], radius_m: float = DEFAULT_RADIUS_M) -> Dict[str, List[Dict]]:
+    """
+    Group cities so that every DEM tile is needed by exactly one group.
+
+    A city near a tile edge reads the neighbouring tiles too, so groups that
+    share any tile are merged (union-find over tile names). Each group can
+    then run in its own worker without two workers reading the same file.
+
+    Returns:
+        {label: cities}, where the label names the group's first tile and how
+        many tiles it spans; cities are sorted by home tile within a group
+    """
+    parent = {}
+
+    def find(name):
+        while parent.setdefault(name, name) != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    cities = list(cities)
+    footprints = []
+    for city in cities:
+        tiles = disc_tiles(city['latitude'], city['longitude'], radius_m)
+        footprints.append(tiles)
+        root = find(tiles[0])
+        for name in tiles[1:]:
+            parent[find(name)] = root
+
+    members = defaultdict(list)
+    tiles_in_group = defaultdict(set)
+    for city, tiles in zip(cities, footprints):
+        root = find(tiles[0])
+        members[root].append(city)
+        tiles_in_group[root].update(tiles)
+
+    groups = {}
+    for root, group in members.items():
+        names = sorted(tiles_in_group[root])
+        label = names[0] if len(names) == 1 else f"{names[0]} (+{len(names) - 1} tiles)"
+        groups[label] = sorted(group, key=lambda city: tile_name(city['latitude'], city['longitude']))
+    return groups
+
+
+def compute_city_elevation_stats(input_dir: Union[str, Path], cities: Iterable[Dict],
+                                 radius_m: float = DEFAULT_RADIUS_M,
+                                 spacing_m: float = SAMPLE_SPACING_M) -> Iterator[Dict]:
+    """
+    Elevation statistics around each city, sampled with sample_elevations.
+
+    Each city's disc is covered by a grid of points spacing_m apart. Cities
+    are processed in batches of at most MAX_POINTS_PER_BATCH points, so
+    memory stays bounded however many cities there are, and discs that
+    cross a tile edge need no special handling. Pass one group from
+    group_by_tiles so no other call needs the same tiles.
+
+    Args:
+        input_dir: Directory containing the 1x1 degree TIFF tiles
+        cities: Dicts with city_id, latitude and longitude
+        radius_m: Radius of the disc summarised around each city
+        spacing_m: Distance between sample points
+
+    Yields:
+        dicts with city_id, elevation_m (bilinear at the centre), min_m,
+        max_m, mean_m, relief_m and sample_count; cities with no valid
+        samples are skipped
+    """
+    input_dir = Path(input_dir)
+    dy, dx = disc_offsets(radius_m, spacing_m)
+    batch_size = max(1, MAX_POINTS_PER_BATCH // len(dy))
+    cities = list(cities)
+    # Tiles stay open across batches, so each is opened once per call
+    datasets = {}
+    try:
+        for start in range(0, len(cities), batch_size):
+            yield from _batch_stats(cities[start:start + batch_size], dy, dx, input_dir, datasets)
+    finally:
+        for dataset in datasets.values():
+            dataset.close()
@@ -1,11 +1,19 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from rasterio.mask import mask
-from shapely.geometry import box
-import rasterio
 
-def create_dem_plot(data, bounds, title=None):
-    """Create DEM plot"""
+# Most city labels drawn on one plot; beyond this they overlap
+MAX_CITY_LABELS = 25
+
+def create_dem_plot(data, bounds, title=None, labels=None):
+    """
+    Create DEM plot
+
+    Args:
+        data: Elevation array
+        bounds: Bounds object with left, bottom, right, top
+        title: Optional plot title
+        labels: Optional list of (name, lat, lon) points to mark, most important first
+    """
     try:
         fig, ax = plt.subplots(figsize=(10, 10))
         
@@ -16,6 +24,14 @@ def create_dem_plot(data, bounds, title=None):
         
         plt.colorbar(im, ax=ax, label='Elevation (meters)')
         
+        if labels:
+            for name, lat, lon in labels[:MAX_CITY_LABELS]:
+                ax.plot(lon, lat, 'o', color='black', markersize=4)
+                ax.annotate(name, (lon, lat), xytext=(4, 4), textcoords='offset points',
+                            fontsize=8, bbox=dict(boxstyle='round,pad=0.2', fc='white', alpha=0.7))
+            ax.set_xlim(bounds.left, bounds.right)
+            ax.set_ylim(bounds.bottom, bounds.top)
+        
         if title:
             ax.set_title(title)
         
@@ -33,6 +49,10 @@ def create_dem_plot(data, bounds, title=None):
 
 def create_adjusted_dem_plot(tiff_path, adjusted_bounds, bounds, title=None):
     """Create DEM plot for an adjusted region"""
+    import rasterio
+    from rasterio.mask import mask
+    from shapely.geometry import box
+    
     try:
         # Create bounding box and get adjusted image
         bbox = box(*adjusted_bounds)
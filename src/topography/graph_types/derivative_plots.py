@@ -0,0 +1,56 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def _create_raster_plot(data, bounds, cmap, label=None, title=None, vmin=None, vmax=None):
+    """Create a lat/lon raster plot in the same layout as the DEM plot"""
+    try:
+        fig, ax = plt.subplots(figsize=(10, 10))
+
+        im = ax.imshow(data,
+                      cmap=cmap,
+                      vmin=vmin,
+                      vmax=vmax,
+                      extent=[bounds.left, bounds.right,
+                             bounds.bottom, bounds.top])
+
+        if label:
+            plt.colorbar(im, ax=ax, label=label)
+
+        if title:
+            ax.set_title(title)
+
+        ax.xaxis.set_major_formatter(plt.FormatStrFormatter('%.2f°'))
+        ax.yaxis.set_major_formatter(plt.FormatStrFormatter('%.2f°'))
+        ax.set_xlabel('Longitude')
+        ax.set_ylabel('Latitude')
+
+        plt.tight_layout()
+
+        return fig
+
+    except Exception as e:
+        return None
+
+def create_hillshade_plot(shade, bounds, title=None):
+    """Create hillshade plot"""
+    return _create_raster_plot(shade, bounds, cmap='gray', title=title, vmin=0, vmax=255)
+
+def create_slope_plot(slope, bounds, title=None):
+    """Create slope plot"""
+    vmax = max(float(np.nanpercentile(slope, 99)), 1.0) if np.isfinite(slope).any() else None
+    return _create_raster_plot(slope, bounds, cmap='magma', label='Slope (degrees)',
+                               title=title, vmin=0, vmax=vmax)
+
+def create_aspect_plot(aspect, bounds, title=None):
+    """Create aspect plot"""
+    return _create_raster_plot(aspect, bounds, cmap='twilight', label='Aspect (degrees from north)',
+                               title=title, vmin=0, vmax=360)
+
+def create_curvature_plot(curv, bounds, title=None):
+    """Create curvature plot"""
+    limit = float(np.nanpercentile(np.abs(curv), 98)) if np.isfinite(curv).any() else 0.0
+    limit = limit or None
+    return _create_raster_plot(curv, bounds, cmap='RdBu_r', label='Curvature (1/100 m)',
+                               title=title,
+                               vmin=-limit if limit else None, vmax=limit)
@@ -1,9 +1,6 @@
 import matplotlib.pyplot as plt
 import numpy as np
 from ridge_map import RidgeMap
-from rasterio.mask import mask
-from shapely.geometry import box
-import rasterio
 
 def create_ridge_plot_optimized(values, title=None, max_lines=200):
     """Create ridge map"""
@@ -38,6 +35,10 @@ def create_ridge_plot_optimized(values, title=None, max_lines=200):
 
 def create_adjusted_ridge_plot(tiff_path, requested_bounds, title=None):
     """Create ridge plot for an adjusted region"""
+    import rasterio
+    from rasterio.mask import mask
+    from shapely.geometry import box
+    
     try:
         # Create bounding box and get adjusted image
         bbox = box(*requested_bounds)
@@ -1,8 +1,5 @@
 import numpy as np
 import plotly.graph_objects as go
-from rasterio.mask import mask
-from shapely.geometry import box
-import rasterio
 
 def downsample_for_3d(data, max_points=100):
     """
@@ -26,8 +23,101 @@ def downsample_for_3d(data, max_points=100):
     # Downsample the data
     return data[::factor, ::factor]
 
-def create_3d_plot(data, bounds):
-    """Create 3D terrain plot"""
+# Number of palette colours for a draped satellite texture. Plotly colours a
+# surface per vertex from a scalar, so RGB is quantized to a discrete colorscale.
+TEXTURE_COLORS = 64
+
+def _mercator_fraction(lat, lon):
+    """Vectorized Web Mercator position as fractions of the world (0..1)"""
+    siny = np.clip(np.sin(np.radians(lat)), -0.9999, 0.9999)
+    x = 0.5 + np.asarray(lon) / 360
+    y = 0.5 - np.log((1 + siny) / (1 - siny)) / (4 * np.pi)
+    return x, y
+
+def satellite_texture(image, bounds, shape, n_colors=TEXTURE_COLORS):
+    """
+    Resample a satellite mosaic onto a DEM grid as a palette texture.
+
+    The mosaic covers ``bounds`` in Web Mercator (as returned by
+    get_satellite_image), while the DEM grid is regular in lat/lon, so each
+    grid vertex is projected to a mosaic pixel and sampled with cv2.remap.
+
+    Args:
+        image: RGB satellite mosaic for the bounds
+        bounds: Bounds object with left, bottom, right, top
+        shape: (rows, cols) of the decimated DEM passed to create_3d_plot
+        n_colors: Palette size
+
+    Returns:
+        Tuple of (indices, palette): float32 palette indices in the DEM's
+        orientation (north row first) and a (n_colors, 3) uint8 RGB palette
+        sorted by luminance, or None if the image is empty
+    """
+    import cv2
+
+    if image is None or image.size == 0:
+        return None
+    rows, cols = shape
+
+    # Shrink first with area averaging so the remap below does not alias
+    img_h, img_w = image.shape[:2]
+    scale = min(1.0, 2 * max(rows / img_h, cols / img_w))
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, round(img_w * scale)), max(1, round(img_h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        img_h, img_w = image.shape[:2]
+
+    # Grid vertices (north row first, like the DEM) -> mosaic pixel coordinates
+    lats = np.linspace(bounds.top, bounds.bottom, rows)
+    lons = np.linspace(bounds.left, bounds.right, cols)
+    left_x, top_y = _mercator_fraction(bounds.top, bounds.left)
+    right_x, bottom_y = _mercator_fraction(bounds.bottom, bounds.right)
+    grid_x, _ = _mercator_fraction(0.0, lons)
+    _, grid_y = _mercator_fraction(lats, 0.0)
+    map_x = (grid_x - left_x) / (right_x - left_x) * (img_w - 1)
+    map_y = (grid_y - top_y) / (bottom_y - top_y) * (img_h - 1)
+    map_x, map_y = np.meshgrid(map_x.astype(np.float32), map_y.astype(np.float32))
+
+    texture = cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    # Quantize to a small palette (deterministic k-means on at most rows * cols pixels)
+    pixels = texture.reshape(-1, 3).astype(np.float32)
+    n_colors = max(2, min(n_colors, len(pixels)))
+    cv2.setRNGSeed(0)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, labels, centers = cv2.kmeans(pixels, n_colors, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+    # k-means labels have no order, and plotly interpolates surfacecolor
+    # between vertices, so sort the palette by luminance: blends between
+    # neighbouring pixels then pass through similar colours, not arbitrary ones
+    order = np.argsort(centers @ np.array([0.299, 0.587, 0.114], dtype=np.float32))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    indices = rank[labels.ravel()].reshape(rows, cols).astype(np.float32)
+    palette = np.clip(np.rint(centers[order]), 0, 255).astype(np.uint8)
+    return indices, palette
+
+def _palette_colorscale(palette):
+    """
+    Stepped plotly colorscale: index i (with cmin=-0.5, cmax=len(palette)-0.5)
+    falls in a flat band of palette[i] rather than a gradient between stops
+    """
+    n = len(palette)
+    scale = []
+    for i, (r, g, b) in enumerate(palette):
+        color = f"rgb({r},{g},{b})"
+        scale += [[i / n, color], [(i + 1) / n, color]]
+    return scale
+
+def create_3d_plot(data, bounds, texture=None):
+    """
+    Create 3D terrain plot
+
+    Args:
+        data: Elevation array (already decimated with downsample_for_3d)
+        bounds: Bounds object with left, bottom, right, top
+        texture: Optional (indices, palette) from satellite_texture for the
+            same grid; the surface is coloured by elevation when None
+    """
     try:
         # Flip the data array vertically to correct orientation
         data = np.flipud(data)
@@ -36,13 +126,25 @@ def create_3d_plot(data, bounds):
         x = np.linspace(bounds.left, bounds.right, data.shape[1])
         X, Y = np.meshgrid(x, y)
         
+        if texture is not None:
+            indices, palette = texture
+            colors = dict(
+                surfacecolor=np.flipud(indices),
+                colorscale=_palette_colorscale(palette),
+                cmin=-0.5,
+                cmax=len(palette) - 0.5,
+                showscale=False,
+                name='Satellite'
+            )
+        else:
+            colors = dict(colorscale='earth', name='Elevation')
+        
         fig = go.Figure(data=[
             go.Surface(
                 z=data,
                 x=X,
                 y=Y,
-                colorscale='earth',
-                name='Elevation'
+                **colors
             )
         ])
 
@@ -67,6 +169,10 @@ def create_3d_plot(data, bounds):
 
 def create_adjusted_3d_plot(tiff_path, requested_bounds):
     """Create 3D plot for an adjusted region"""
+    import rasterio
+    from rasterio.mask import mask
+    from shapely.geometry import box
+    
     try:
         # Create bounding box and get adjusted image
         bbox = box(*requested_bounds)
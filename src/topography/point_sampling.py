@@ -0,0 +1,138 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+SAMPLING_METHODS = ('nearest', 'bilinear')
+
+
+def _tile_keys(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """One integer per 1x1 degree tile: (floor(lon) + 180) * 1000 + floor(lat) + 90"""
+    return (np.floor(lons).astype(np.int64) + 180) * 1000 + np.floor(lats).astype(np.int64) + 90
+
+
+def _tile_path(input_dir: Path, key: int) -> Path:
+    x, y = key // 1000 - 180, key % 1000 - 90
+    return input_dir / f"xmin{x}_xmax{x+1}_ymin{y}_ymax{y+1}.tif"
+
+
+def _sample_tile(src, lats: np.ndarray, lons: np.ndarray, method: str) -> np.ndarray:
+    """
+    Sample one open tile at points inside it, reading only the blocks they fall in.
+
+    Points are bucketed by internal block; each block is read once with a
+    one pixel margin on the right and bottom so bilinear neighbours are
+    available. Neighbours beyond the tile edge are clamped to the edge.
+    """
+    from rasterio.windows import Window
+
+    t = src.transform
+    height, width = src.height, src.width
+    block_h, block_w = src.block_shapes[0]
+
+    # Fractional pixel coordinates, with pixel centres at integers
+    col_f = (lons - t.c) / t.a - 0.5
+    row_f = (lats - t.f) / t.e - 0.5
+    if method == 'nearest':
+        col0 = np.clip(np.rint(col_f), 0, width - 1).astype(np.int64)
+        row0 = np.clip(np.rint(row_f), 0, height - 1).astype(np.int64)
+    else:
+        col_f = np.clip(col_f, 0, width - 1)
+        row_f = np.clip(row_f, 0, height - 1)
+        col0 = np.minimum(np.floor(col_f).astype(np.int64), width - 1)
+        row0 = np.minimum(np.floor(row_f).astype(np.int64), height - 1)
+
+    values = np.full(lats.shape, np.nan, dtype=np.float32)
+    blocks_per_row = (width + block_w - 1) // block_w
+    block_ids = (row0 // block_h) * blocks_per_row + col0 // block_w
+    order = np.argsort(block_ids, kind='stable')
+    unique_blocks, starts = np.unique(block_ids[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+
+    for block, start, end in zip(unique_blocks, starts, ends):
+        idx = order[start:end]
+        block_row = int(block // blocks_per_row) * block_h
+        block_col = int(block % blocks_per_row) * block_w
+        window = Window(block_col, block_row,
+                        min(block_w + 1, width - block_col), min(block_h + 1, height - block_row))
+        data = src.read(1, window=window).astype(np.float32)
+        if src.nodata is not None:
+            data[data == src.nodata] = np.nan
+
+        r = row0[idx] - block_row
+        c = col0[idx] - block_col
+        if method == 'nearest':
+            values[idx] = data[r, c]
+            continue
+
+        r1 = np.minimum(r + 1, data.shape[0] - 1)
+        c1 = np.minimum(c + 1, data.shape[1] - 1)
+        fy = (row_f[idx] - row0[idx]).astype(np.float32)
+        fx = (col_f[idx] - col0[idx]).astype(np.float32)
+        top = data[r, c] * (1 - fx) + data[r, c1] * fx
+        bottom = data[r1, c] * (1 - fx) + data[r1, c1] * fx
+        values[idx] = top * (1 - fy) + bottom * fy
+
+    return values
+
+
+def sample_elevations(lats, lons, method: str = 'nearest',
+                      input_dir: Optional[Union[str, Path]] = None,
+                      datasets: Optional[Dict[Path, Any]] = None) -> np.ndarray:
+    """
+    Elevation at many points, read straight from the DEM tiles.
+
+    Points are bucketed by 1x1 degree tile and, within a tile, by internal
+    block, so each needed block is read once and nothing else is. Memory is
+    the input and output arrays plus one block at a time.
+
+    Args:
+        lats, lons: Array-likes of the same shape, in degrees
+        method: 'nearest' or 'bilinear'
+        input_dir: Directory containing the 1x1 degree TIFF tiles (defaults
+            to the configured data source)
+        datasets: Optional {path: open dataset} dict shared across calls;
+            tiles are opened into it and left open for the caller to close,
+            so repeated calls do not reopen the same files
+
+    Returns:
+        float32 array shaped like lats, NaN where there is no tile or no data
+    """
+    import rasterio
+
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown method: {method}. Use one of: {', '.join(SAMPLING_METHODS)}")
+    if input_dir is None:
+        from src.config.data_source_config import get_base_path, get_data_source
+        input_dir = get_base_path(get_data_source())
+    input_dir = Path(input_dir)
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if lats.shape != lons.shape:
+        raise ValueError("lats and lons must have the same shape")
+    shape = lats.shape
+    lats, lons = lats.ravel(), lons.ravel()
+
+    values = np.full(lats.shape, np.nan, dtype=np.float32)
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    points = np.flatnonzero(valid)
+    keys = _tile_keys(lats[points], lons[points])
+    order = np.argsort(keys, kind='stable')
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+
+    for key, start, end in zip(unique_keys, starts, ends):
+        path = _tile_path(input_dir, int(key))
+        if not path.exists():
+            continue
+        idx = points[order[start:end]]
+        if datasets is None:
+            with rasterio.open(path) as src:
+                values[idx] = _sample_tile(src, lats[idx], lons[idx], method)
+            continue
+        if path not in datasets:
+            datasets[path] = rasterio.open(path)
+        values[idx] = _sample_tile(datasets[path], lats[idx], lons[idx], method)
+
+    return values.reshape(shape)
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Union
+
+import numpy as np
+
+# Time allowed for the coarse preview before we give up on it and wait for the full render
+PREVIEW_BUDGET_SECONDS = 1.5
+PREVIEW_MAX_SIZE = 256
+
+# Previews get their own pool so they never queue behind full refinements
+# from other sessions and can meet PREVIEW_BUDGET_SECONDS under load
+REFINEMENT_WORKERS = 4
+PREVIEW_WORKERS = 4
+
+_refinement_executor = ThreadPoolExecutor(max_workers=REFINEMENT_WORKERS, thread_name_prefix='refinement')
+_preview_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix='preview')
+
+
+class RefinementCancelled(Exception):
+    """Raised inside a refinement when a newer request has replaced it."""
+
+
+class RefinementJob:
+    """A full-resolution job running in the background, tied to a request key."""
+
+    def __init__(self, key: Hashable, future: Future, cancel_event: threading.Event):
+        self.key = key
+        self.future = future
+        self.cancel_event = cancel_event
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next checkpoint"""
+        self.cancel_event.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds; True if the job has finished"""
+        try:
+            self.future.exception(timeout=timeout)
+        except TimeoutError:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def result(self) -> Any:
+        return self.future.result()
+
+
+def start_refinement(key: Hashable, fn: Callable[[threading.Event], Any]) -> RefinementJob:
+    """
+    Run ``fn(cancel_event)`` in the background.
+
+    ``fn`` should check the event between stages (or call ``check_cancelled``)
+    so a stale job stops early once it has been cancelled.
+    """
+    cancel_event = threading.Event()
+    future = _refinement_executor.submit(fn, cancel_event)
+    return RefinementJob(key, future, cancel_event)
+
+
+def check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """Raise RefinementCancelled if the event has been set"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise RefinementCancelled()
+
+
+def run_with_budget(fn: Callable[[], Any], budget_seconds: float = PREVIEW_BUDGET_SECONDS) -> Optional[Any]:
+    """
+    Run ``fn`` with a latency budget.
+
+    Returns:
+        The result, or None if it did not finish in time or failed. A late
+        result is simply discarded.
+    """
+    future = _preview_executor.submit(fn)
+    try:
+        return future.result(timeout=budget_seconds)
+    except TimeoutError:
+        future.cancel()
+        return None
+    except Exception as e:
+        print(f"Error building preview: {str(e)}")
+        return None
+
+
+def load_preview(input_dir: Union[str, Path], bounds, max_size: int = PREVIEW_MAX_SIZE) -> Optional[np.ndarray]:
+    """
+    Read a heavily decimated view of a region straight from the DEM tiles.
+
+    The read asks GDAL for a small output shape, so it is served from the
+    tile overviews when they exist and from a decimated read otherwise. No
+    temporary mosaic is written.
+
+    Args:
+        input_dir: Directory containing the 1x1 degree TIFF tiles
+        bounds: Object with left, bottom, right and top attributes
+        max_size: Size in pixels of the longer side of the preview
+
+    Returns:
+        2D elevation array covering ``bounds``, or None if no tiles are found
+    """
+    import rasterio
+    from rasterio.merge import merge
+    from src.data_sources.file_parseing import get_required_file_names
+
+    tiff_files = [
+        Path(input_dir) / name
+        for name in get_required_file_names(bounds)
+        if (Path(input_dir) / name).exists()
+    ]
+    if not tiff_files:
+        return None
+
+    res = max(bounds.right - bounds.left, bounds.top - bounds.bottom) / max_size
+    src_files = [rasterio.open(f) for f in tiff_files]
+    try:
+        merged, _ = merge(
+            src_files,
+            bounds=(bounds.left, bounds.bottom, bounds.right, bounds.top),
+            res=res,
+            nodata=np.nan,
+            dtype='float32'
+        )
+    finally:
+        for src in src_files:
+            src.close()
+
+    return merged[0]
@@ -0,0 +1,247 @@
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_TIMEOUT_SECONDS = 60
+DEFAULT_MAX_QUEUE = 8
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render pool already has its maximum number of pending jobs."""
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Picklable reference to a NumPy array stored in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def share_array(data: np.ndarray) -> Tuple[shared_memory.SharedMemory, SharedArrayHandle]:
+    """
+    Copy an array into a new shared memory block.
+
+    The caller owns the block and must close and unlink it when done.
+    """
+    data = np.ascontiguousarray(data)
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+    return shm, SharedArrayHandle(shm.name, data.shape, data.dtype.str)
+
+
+def _attach(handle: SharedArrayHandle) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Attach to a shared array from a worker without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=handle.name, track=False)
+    else:
+        # Spawned workers share the parent's resource tracker, so attaching
+        # only re-adds a name it already holds. The parent that created the
+        # block stays its owner and unlinks it (or the tracker does if the
+        # parent dies); unregistering here would break both.
+        shm = shared_memory.SharedMemory(name=handle.name)
+    return shm, np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+
+
+def _bounds(params: Dict[str, Any]):
+    return SimpleNamespace(**params['bounds'])
+
+
+def _render_dem(data, params):
+    from src.topography.graph_types.dem_plots import create_dem_plot
+    return create_dem_plot(data, _bounds(params), params.get('title'), params.get('labels'))
+
+def _render_ridge(data, params):
+    from src.topography.graph_types.ridge_plots import create_ridge_plot_optimized
+    return create_ridge_plot_optimized(data, title=params.get('title'))
+
+def _render_derivative(plot_name):
+    def render(data, params):
+        from src.topography.graph_types import derivative_plots
+        return getattr(derivative_plots, plot_name)(data, _bounds(params), params.get('title'))
+    return render
+
+# Renderer name -> function(data, params) returning a matplotlib figure
+RENDERERS = {
+    'dem': _render_dem,
+    'ridge': _render_ridge,
+    'hillshade': _render_derivative('create_hillshade_plot'),
+    'slope': _render_derivative('create_slope_plot'),
+    'aspect': _render_derivative('create_aspect_plot'),
+    'curvature': _render_derivative('create_curvature_plot'),
+}
+
+
+def render_to_bytes(renderer: str, data: np.ndarray, params: Dict[str, Any],
+                    image_format: str = 'png', dpi: int = 100) -> Optional[bytes]:
+    """
+    Build a figure with a named renderer and encode it.
+
+    Returns:
+        Encoded image bytes, or None if the renderer produced no figure
+    """
+    import matplotlib.pyplot as plt
+
+    fig = RENDERERS[renderer](data, params)
+    if fig is None:
+        return None
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=image_format, dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render_worker(handle: SharedArrayHandle, renderer: str, params: Dict[str, Any],
+                   image_format: str, dpi: int) -> Optional[bytes]:
+    shm, data = _attach(handle)
+    try:
+        return render_to_bytes(renderer, data, params, image_format=image_format, dpi=dpi)
+    finally:
+        del data
+        shm.close()
+
+
+class RenderTask:
+    """A submitted render. The shared memory block is released once the worker is done."""
+
+    def __init__(self, future, shm: shared_memory.SharedMemory, release):
+        self.future = future
+        self._shm = shm
+        self._release = release
+        future.add_done_callback(self._cleanup)
+
+    def _cleanup(self, _future) -> None:
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._release()
+
+    def cancel(self) -> bool:
+        """Cancel the render if a worker has not picked it up yet"""
+        return self.future.cancel()
+
+    def result(self, timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS) -> Optional[bytes]:
+        """
+        Wait for the encoded image.
+
+        Raises:
+            TimeoutError: The render did not finish in time. A queued render
+                is cancelled; a running one finishes in the background and
+                its result is dropped.
+            CancelledError: The render was cancelled.
+        """
+        try:
+            return self.future.result(timeout=timeout)
+        except TimeoutError:
+            self.cancel()
+            raise
+
+
+class RenderPool:
+    """
+    Renders figures in worker processes so matplotlib does not hold the GIL
+    of the Streamlit server.
+
+    Arrays are passed through shared memory and results come back as
+    encoded image bytes. At most ``max_workers + max_queue`` renders can be
+    pending; further submissions raise RenderQueueFull.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Initialize the render pool.
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count, max 4)
+            max_queue: Number of renders allowed to wait for a free worker
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+
+    def submit(self, renderer: str, data: np.ndarray, params: Dict[str, Any],
+               image_format: str = 'png', dpi: int = 100) -> RenderTask:
+        """
+        Queue a render.
+
+        Args:
+            renderer: Name from RENDERERS
+            data: Array to render, copied once into shared memory
+            params: Picklable renderer parameters (bounds as a dict, title, ...)
+            image_format: Output format for savefig
+            dpi: Output resolution
+
+        Raises:
+            RenderQueueFull: Too many renders are already pending
+        """
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {renderer}. Available renderers: {', '.join(RENDERERS)}")
+        if not self._slots.acquire(blocking=False):
+            raise RenderQueueFull(f"Render queue is full ({self.max_workers} workers busy)")
+
+        try:
+            shm, handle = share_array(data)
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            future = self._executor.submit(_render_worker, handle, renderer, params, image_format, dpi)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            self._slots.release()
+            raise
+        return RenderTask(future, shm, self._slots.release)
+
+    def render(self, renderer: str, data: np.ndarray, params: Dict[str, Any],
+               timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS, **kwargs) -> Optional[bytes]:
+        """Submit a render and wait for the encoded image"""
+        return self.submit(renderer, data, params, **kwargs).result(timeout=timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_render_pool() -> RenderPool:
+    """Get the process-wide render pool, shared by all sessions"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool()
+        return _pool
+
+
+def bounds_params(bounds, **params) -> Dict[str, Any]:
+    """Build renderer params from a bounds object plus extra values"""
+    params['bounds'] = {
+        'left': bounds.left,
+        'bottom': bounds.bottom,
+        'right': bounds.right,
+        'top': bounds.top
+    }
+    return params
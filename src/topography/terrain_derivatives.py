@@ -0,0 +1,271 @@
+import math
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Approximate length of one degree on the WGS84 ellipsoid, in meters
+METERS_PER_DEGREE_LAT = 110574.0
+METERS_PER_DEGREE_LON = 111320.0
+
+DERIVATIVE_PRODUCTS = ('hillshade', 'slope', 'aspect', 'curvature')
+
+
+def pad_with_halo(data: np.ndarray, halo: int = 1) -> np.ndarray:
+    """
+    Pad an elevation array with a halo by repeating its edge values.
+
+    Used when no neighbouring tile data is available, so the outermost
+    row and column still get a (flat-edged) 3x3 neighbourhood.
+    """
+    return np.pad(data, halo, mode='edge')
+
+
+def _neighbourhood(padded: np.ndarray):
+    """
+    Return the nine 3x3 neighbourhood views of a padded array.
+
+    The views are produced with sliding_window_view, so they are strided
+    views over ``padded`` and no data is copied:
+
+        a b c
+        d e f
+        g h i
+    """
+    windows = sliding_window_view(padded, (3, 3))
+    return (
+        windows[..., 0, 0], windows[..., 0, 1], windows[..., 0, 2],
+        windows[..., 1, 0], windows[..., 1, 1], windows[..., 1, 2],
+        windows[..., 2, 0], windows[..., 2, 1], windows[..., 2, 2],
+    )
+
+
+def cell_size_meters(bounds, shape: Tuple[int, int]) -> Tuple[np.ndarray, float]:
+    """
+    Calculate the ground size of a cell for a north-up lat/lon grid.
+
+    Args:
+        bounds: Object with left, bottom, right and top attributes (degrees)
+        shape: (rows, cols) of the grid covering the bounds
+
+    Returns:
+        Tuple of (dx per row as a column vector, dy) in meters. dx shrinks
+        with latitude, so it is returned per row for broadcasting.
+    """
+    rows, cols = shape
+    res_x = (bounds.right - bounds.left) / cols
+    res_y = (bounds.top - bounds.bottom) / rows
+
+    # Row centers run from north to south
+    row_lats = bounds.top - (np.arange(rows) + 0.5) * res_y
+    dx = res_x * METERS_PER_DEGREE_LON * np.cos(np.radians(row_lats))
+    dy = res_y * METERS_PER_DEGREE_LAT
+
+    return dx[:, np.newaxis], dy
+
+
+def gradients(padded: np.ndarray, dx, dy: float, method: str = 'horn') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the surface gradient of a padded elevation array.
+
+    Args:
+        padded: Elevation array with a one pixel halo on every side
+        dx: Cell width in meters (scalar or per-row column vector)
+        dy: Cell height in meters
+        method: 'horn' (3rd order, 8 neighbours) or 'zevenbergen_thorne'
+            (2nd order, 4 neighbours)
+
+    Returns:
+        Tuple of (dz/dx, dz/dy) with x increasing east and y increasing south
+    """
+    a, b, c, d, e, f, g, h, i = _neighbourhood(padded)
+
+    if method == 'horn':
+        dzdx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * dx)
+        dzdy = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * dy)
+    elif method == 'zevenbergen_thorne':
+        dzdx = (f - d) / (2 * dx)
+        dzdy = (h - b) / (2 * dy)
+    else:
+        raise ValueError(f"Unknown gradient method: {method}")
+
+    return dzdx, dzdy
+
+
+def slope_degrees(dzdx: np.ndarray, dzdy: np.ndarray) -> np.ndarray:
+    """Slope in degrees from the surface gradient"""
+    return np.degrees(np.arctan(np.hypot(dzdx, dzdy)))
+
+
+def aspect_degrees(dzdx: np.ndarray, dzdy: np.ndarray) -> np.ndarray:
+    """
+    Aspect in compass degrees (0 = north, clockwise) of the downslope direction.
+    Flat cells are returned as NaN.
+    """
+    aspect = np.degrees(np.arctan2(dzdy, -dzdx))
+    aspect = np.where(aspect > 90.0, 450.0 - aspect, 90.0 - aspect)
+    return np.where((dzdx == 0) & (dzdy == 0), np.nan, aspect)
+
+
+def hillshade(dzdx: np.ndarray, dzdy: np.ndarray, azimuth: float = 315.0,
+              altitude: float = 45.0, z_factor: float = 1.0) -> np.ndarray:
+    """
+    Hillshade (0-255) from the surface gradient.
+
+    Args:
+        dzdx, dzdy: Surface gradient from ``gradients``
+        azimuth: Compass direction of the light source in degrees
+        altitude: Angle of the light source above the horizon in degrees
+        z_factor: Vertical exaggeration
+    """
+    zenith = math.radians(90.0 - altitude)
+    azimuth_math = math.radians((360.0 - azimuth + 90.0) % 360.0)
+
+    slope = np.arctan(z_factor * np.hypot(dzdx, dzdy))
+    aspect = np.arctan2(dzdy, -dzdx)
+    aspect = np.where(aspect < 0, aspect + 2 * np.pi, aspect)
+
+    shade = 255.0 * (
+        math.cos(zenith) * np.cos(slope)
+        + math.sin(zenith) * np.sin(slope) * np.cos(azimuth_math - aspect)
+    )
+    return np.clip(shade, 0, 255)
+
+
+def curvature(padded: np.ndarray, dx, dy: float) -> np.ndarray:
+    """
+    Zevenbergen-Thorne total curvature of a padded elevation array.
+
+    Positive values are convex (ridges), negative values are concave
+    (valleys). Units are 1/100 m, matching common GIS tools.
+    """
+    _, b, _, d, e, f, _, h, _ = _neighbourhood(padded)
+    D = ((d + f) / 2 - e) / (dx * dx)
+    E = ((b + h) / 2 - e) / (dy * dy)
+    return -2 * (D + E) * 100
+
+
+def compute_terrain_derivatives(
+    data: np.ndarray,
+    bounds,
+    products: Iterable[str] = DERIVATIVE_PRODUCTS,
+    halo: Optional[np.ndarray] = None,
+    method: str = 'horn',
+) -> Dict[str, np.ndarray]:
+    """
+    Compute terrain derivatives for an elevation mosaic.
+
+    Args:
+        data: 2D elevation array (north-up) covering ``bounds``
+        bounds: Object with left, bottom, right and top attributes
+        products: Any of 'hillshade', 'slope', 'aspect', 'curvature'
+        halo: Optional array of shape (rows + 2, cols + 2) holding the same
+            region plus one pixel read from the neighbouring tiles. When it
+            is not given the edges are padded by repeating edge values.
+        method: Gradient kernel, 'horn' or 'zevenbergen_thorne'
+
+    Returns:
+        Dictionary mapping each requested product to an array the same
+        shape as ``data``
+    """
+    products = tuple(products)
+    unknown = set(products) - set(DERIVATIVE_PRODUCTS)
+    if unknown:
+        raise ValueError(f"Unknown terrain products: {', '.join(sorted(unknown))}")
+
+    data = np.asarray(data, dtype=np.float32)
+    padded = pad_with_halo(data)
+    if halo is not None and halo.shape == padded.shape:
+        # Take only the outer ring from the neighbouring tiles so the interior
+        # matches the displayed data exactly; nodata in the ring keeps the edge value
+        ring = np.ones(padded.shape, dtype=bool)
+        ring[1:-1, 1:-1] = False
+        ring &= ~np.isnan(halo)
+        padded[ring] = halo[ring]
+
+    dx, dy = cell_size_meters(bounds, data.shape)
+    results = {}
+
+    if {'hillshade', 'slope', 'aspect'} & set(products):
+        dzdx, dzdy = gradients(padded, dx, dy, method=method)
+        if 'hillshade' in products:
+            results['hillshade'] = hillshade(dzdx, dzdy).astype(np.float32)
+        if 'slope' in products:
+            results['slope'] = slope_degrees(dzdx, dzdy).astype(np.float32)
+        if 'aspect' in products:
+            results['aspect'] = aspect_degrees(dzdx, dzdy).astype(np.float32)
+
+    if 'curvature' in products:
+        results['curvature'] = curvature(padded, dx, dy).astype(np.float32)
+
+    return results
+
+
+def load_dem_with_halo(input_dir: Union[str, Path], bounds, shape: Tuple[int, int],
+                       halo: int = 1) -> Optional[np.ndarray]:
+    """
+    Read a region from the DEM tile set with a halo from the neighbouring tiles.
+
+    The region is resampled to ``shape`` (so it lines up with the array being
+    displayed) and grown by ``halo`` pixels on every side using data from the
+    adjacent 1x1 degree tiles, which keeps derivatives seamless at the edges.
+
+    Args:
+        input_dir: Directory containing the 1x1 degree TIFF tiles
+        bounds: Object with left, bottom, right and top attributes
+        shape: (rows, cols) of the region without the halo
+        halo: Number of extra pixels to read on every side
+
+    Returns:
+        Array of shape (rows + 2 * halo, cols + 2 * halo), or None when no
+        tiles are available
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.merge import merge
+    from src.data_sources.file_parseing import Bounds, get_required_file_names
+
+    rows, cols = shape
+    res_x = (bounds.right - bounds.left) / cols
+    res_y = (bounds.top - bounds.bottom) / rows
+    expanded = Bounds(
+        left=bounds.left - halo * res_x,
+        bottom=bounds.bottom - halo * res_y,
+        right=bounds.right + halo * res_x,
+        top=bounds.top + halo * res_y,
+    )
+
+    tiff_files = [
+        Path(input_dir) / name
+        for name in get_required_file_names(expanded)
+        if (Path(input_dir) / name).exists()
+    ]
+    if not tiff_files:
+        return None
+
+    src_files = [rasterio.open(f) for f in tiff_files]
+    try:
+        merged, _ = merge(
+            src_files,
+            bounds=(expanded.left, expanded.bottom, expanded.right, expanded.top),
+            res=(res_x, res_y),
+            nodata=np.nan,
+            dtype='float32',
+            resampling=Resampling.average,
+        )
+    finally:
+        for src in src_files:
+            src.close()
+
+    padded = merged[0]
+    expected = (rows + 2 * halo, cols + 2 * halo)
+    if padded.shape != expected:
+        # Rounding in merge can add or drop a row/column; trim or edge-pad to fit
+        padded = padded[:expected[0], :expected[1]]
+        pad_rows = expected[0] - padded.shape[0]
+        pad_cols = expected[1] - padded.shape[1]
+        if pad_rows or pad_cols:
+            padded = np.pad(padded, ((0, pad_rows), (0, pad_cols)), mode='edge')
+
+    return padded
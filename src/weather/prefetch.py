@@ -0,0 +1,263 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.weather.weather_client import WeatherClient, get_weather_client
+
+# One Call 3.0 includes 1,000 calls a day and bills every call beyond that.
+# 10 locations every 30 minutes is 480 calls a day per server process, and
+# the daily budget is a hard stop that leaves room for user lookups.
+DEFAULT_TOP_N = int(os.getenv('WEATHER_PREFETCH_TOP_N', '10'))
+DEFAULT_INTERVAL_SECONDS = float(os.getenv('WEATHER_PREFETCH_INTERVAL_SECONDS', '1800'))
+DEFAULT_DAILY_BUDGET = int(os.getenv('WEATHER_PREFETCH_DAILY_CALLS', '500'))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('WEATHER_PREFETCH_CONCURRENCY', '4'))
+# Smooths bursts so a cycle does not hit the upstream all at once
+DEFAULT_RATE_PER_MINUTE = float(os.getenv('WEATHER_PREFETCH_RATE_PER_MINUTE', '30'))
+
+
+class RateLimiter:
+    """Token bucket shared by the prefetch workers."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """Wait for a token. Returns False if stop_event was set while waiting"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+class DailyBudget:
+    """Number of calls allowed per UTC day, reset at midnight UTC."""
+
+    def __init__(self, calls_per_day: int):
+        self.calls_per_day = calls_per_day
+        self._day = None
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def _roll(self) -> None:
+        day = time.gmtime().tm_yday
+        if day != self._day:
+            self._day = day
+            self._used = 0
+
+    def spend(self) -> bool:
+        """Take one call from today's budget. Returns False if it is used up"""
+        with self._lock:
+            self._roll()
+            if self._used >= self.calls_per_day:
+                return False
+            self._used += 1
+            return True
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return max(self.calls_per_day - self._used, 0)
+
+
+class WeatherPrefetcher:
+    """
+    Background thread that keeps weather warm for high-traffic cities.
+
+    Every ``interval_seconds`` it takes the most requested grid cells from the
+    client, tops the list up to ``top_n`` with the most populous cities, and
+    refreshes every target whose entry would go stale before the next cycle.
+    Refreshes run with bounded concurrency behind a shared rate limit and
+    stop for the day once the daily call budget is spent.
+    """
+
+    def __init__(
+        self,
+        client: Optional[WeatherClient] = None,
+        top_n: int = DEFAULT_TOP_N,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        rate_per_minute: float = DEFAULT_RATE_PER_MINUTE,
+        daily_budget: int = DEFAULT_DAILY_BUDGET
+    ):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            client: Weather client to warm (defaults to the shared one)
+            top_n: Number of locations kept warm
+            interval_seconds: Time between cycles
+            max_concurrency: Simultaneous upstream requests
+            rate_per_minute: Upstream request rate for prefetching
+            daily_budget: Upstream calls prefetching may make per UTC day
+        """
+        self.client = client or get_weather_client()
+        self.top_n = top_n
+        self.interval_seconds = interval_seconds
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(rate_per_minute / 60)
+        self.budget = DailyBudget(daily_budget)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._targets = []
+        self._metrics = {
+            'cycles': 0,
+            'last_cycle_at': None,
+            'last_cycle_seconds': None,
+            'refreshed': 0,
+            'skipped': 0,
+            'over_budget': 0,
+            'errors': 0,
+            'last_cycle_errors': 0,
+            'last_cycle_attempts': 0,
+            'last_error': None
+        }
+
+    def targets(self) -> List[Tuple[float, float]]:
+        """Locations to keep warm: most requested cells first, then the most populous cities"""
+        targets = [cell for cell, _ in self.client.most_requested(self.top_n)]
+        if len(targets) < self.top_n:
+            from src.database.db_utils import get_most_populous_cities
+            seen = set(targets)
+            for city in get_most_populous_cities(self.top_n * 2):
+                cell = self.client.cell(city['latitude'], city['longitude'])
+                if cell not in seen:
+                    seen.add(cell)
+                    targets.append(cell)
+                if len(targets) >= self.top_n:
+                    break
+        return targets
+
+    def _needs_refresh(self, lat: float, lon: float) -> bool:
+        age = self.client.entry_age(lat, lon)
+        # Refresh anything that would expire before the next cycle (with the
+        # default interval longer than the TTL, that is every target)
+        return age is None or age >= self.client.ttl_seconds - self.interval_seconds
+
+    def _refresh(self, lat: float, lon: float) -> bool:
+        if not self.budget.spend():
+            with self._lock:
+                self._metrics['over_budget'] += 1
+            return False
+        if not self.rate_limiter.acquire(self._stop):
+            return False
+        self.client.refresh(lat, lon)
+        return True
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run a single prefetch cycle and return the updated metrics"""
+        started = time.time()
+        try:
+            targets = self.targets()
+        except Exception as e:
+            print(f"Weather prefetch could not load targets: {str(e)}")
+            targets = []
+        due = [cell for cell in targets if self._needs_refresh(*cell)]
+
+        refreshed = errors = 0
+        last_error = None
+        if due:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='weather-prefetch') as executor:
+                futures = [executor.submit(self._refresh, lat, lon) for lat, lon in due]
+                for future in as_completed(futures):
+                    try:
+                        if future.result():
+                            refreshed += 1
+                    except Exception as e:
+                        errors += 1
+                        last_error = str(e)
+
+        with self._lock:
+            self._targets = targets
+            m = self._metrics
+            m['cycles'] += 1
+            m['last_cycle_at'] = started
+            m['last_cycle_seconds'] = time.time() - started
+            m['refreshed'] += refreshed
+            m['skipped'] += len(targets) - len(due)
+            m['errors'] += errors
+            m['last_cycle_errors'] = errors
+            m['last_cycle_attempts'] = refreshed + errors
+            if last_error:
+                m['last_error'] = last_error
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Freshness and error metrics.
+
+        Returns:
+            dict with cycle counters, ``error_rate`` (all cycles) and
+            ``last_cycle_error_rate``, ``budget_remaining`` (calls left
+            today), ``warm_fraction`` (targets with a fresh
+            entry) and the median / max entry age of the targets in seconds
+        """
+        with self._lock:
+            m = dict(self._metrics)
+            targets = list(self._targets)
+
+        m['budget_remaining'] = self.budget.remaining()
+        attempts = m['refreshed'] + m['errors']
+        m['error_rate'] = m['errors'] / attempts if attempts else 0.0
+        m['last_cycle_error_rate'] = (
+            m['last_cycle_errors'] / m['last_cycle_attempts'] if m['last_cycle_attempts'] else 0.0
+        )
+
+        ages = [self.client.entry_age(lat, lon) for lat, lon in targets]
+        known = [age for age in ages if age is not None]
+        m['targets'] = len(targets)
+        m['warm_fraction'] = (
+            sum(age < self.client.ttl_seconds for age in known) / len(targets) if targets else 0.0
+        )
+        m['median_age_seconds'] = statistics.median(known) if known else None
+        m['max_age_seconds'] = max(known) if known else None
+        return m
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Weather prefetch cycle failed: {str(e)}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> 'WeatherPrefetcher':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='weather-prefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_weather_prefetcher() -> WeatherPrefetcher:
+    """Get the process-wide prefetcher, starting it on first use"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = WeatherPrefetcher().start()
+        return _prefetcher
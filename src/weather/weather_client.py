@@ -0,0 +1,281 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'https://api.openweathermap.org/data/3.0/onecall'
+
+# (connect, read) timeouts in seconds; a slow upstream must not stall the page
+DEFAULT_TIMEOUT = (3.05, 5.0)
+
+# Responses are keyed by lat/lon snapped to this grid (0.05° is ~5 km)
+DEFAULT_GRID_DEGREES = 0.05
+
+# Fresh for the TTL; after that served stale while a background refresh runs,
+# until the entry is older than TTL + stale window
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_STALE_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+# Request counts (used to pick prefetch targets) are halved every half-life
+# so old interest fades, and only the busiest cells are kept
+REQUEST_COUNT_HALF_LIFE_SECONDS = 3600
+MAX_COUNTED_CELLS = 256
+
+
+class WeatherError(Exception):
+    """Raised when weather data could not be fetched and nothing is cached."""
+
+
+@dataclass
+class _Entry:
+    data: Dict[str, Any]
+    fetched_at: float
+
+
+class _Flight:
+    """One upstream request shared by every caller asking for the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+def parse_weather(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the fields shown in the info panel from a One Call response"""
+    current = data.get('current', {})
+    alerts = data.get('alerts', [])
+
+    return {
+        'temperature': current.get('temp'),
+        'feels_like': current.get('feels_like'),
+        'humidity': current.get('humidity'),
+        'wind_speed': current.get('wind_speed'),
+        'description': current.get('weather', [{}])[0].get('description', '').title(),
+        'alerts': [
+            {
+                'event': alert.get('event'),
+                'description': alert.get('description'),
+                'start': alert.get('start'),
+                'end': alert.get('end')
+            }
+            for alert in alerts
+        ]
+    }
+
+
+class WeatherClient:
+    """
+    OpenWeather One Call client with a shared session and a response cache.
+
+    - Requests go through one pooled keep-alive session with strict timeouts.
+    - Responses are cached per grid cell (lat/lon snapped to ``grid_degrees``)
+      and the snapped coordinates are what is requested, so every point in a
+      cell gets the same answer.
+    - A stale entry is returned immediately while one background refresh runs
+      (stale-while-revalidate). If a fetch fails, any cached entry is served.
+    - Concurrent requests for the same cell share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        grid_degrees: float = DEFAULT_GRID_DEGREES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        pool_size: int = 8
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: One Call endpoint, defaults to OPENWEATHER_BASE_URL or the public API
+            api_key: API key, defaults to OPENWEATHER_API_KEY
+            timeout: (connect, read) timeouts in seconds
+            grid_degrees: Cache grid size in degrees
+            ttl_seconds: Age after which an entry is refreshed
+            stale_seconds: How long past the TTL a stale entry may still be served
+            max_entries: Number of grid cells kept (least recently used are dropped)
+            pool_size: Connection pool size and number of background refresh threads
+        """
+        self.base_url = base_url or os.getenv('OPENWEATHER_BASE_URL', DEFAULT_BASE_URL)
+        self.api_key = api_key if api_key is not None else os.getenv('OPENWEATHER_API_KEY')
+        self.timeout = timeout
+        self.grid_degrees = grid_degrees
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._cache = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='weather')
+        self.request_counts = Counter()
+        self._counts_decayed_at = time.time()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'upstream': 0, 'errors': 0}
+
+    def cell(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Snap a coordinate to the centre of its cache grid cell"""
+        g = self.grid_degrees
+        return round(round(lat / g) * g, 6), round(round(lon / g) * g, 6)
+
+    def _fetch(self, key: Tuple[float, float]) -> Dict[str, Any]:
+        lat, lon = key
+        params = {'lat': lat, 'lon': lon, 'units': 'imperial', 'appid': self.api_key}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_weather(response.json())
+
+    def _store(self, key, data) -> None:
+        with self._lock:
+            self._cache[key] = _Entry(data, time.time())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _single_flight(self, key) -> Tuple[_Flight, bool]:
+        """Join the in-flight request for key, or register a new one (returns leader flag)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats['coalesced'] += 1
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            self.stats['upstream'] += 1
+            return flight, True
+
+    def _run_flight(self, key, flight: _Flight) -> None:
+        try:
+            flight.data = self._fetch(key)
+            self._store(key, flight.data)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _refresh_in_background(self, key) -> None:
+        flight, leader = self._single_flight(key)
+        if leader:
+            self._refresher.submit(self._run_flight, key, flight)
+
+    def refresh(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Fetch a cell now, bypassing the cache, and store the result.
+
+        Raises:
+            WeatherError: The upstream request failed
+        """
+        key = self.cell(lat, lon)
+        flight, leader = self._single_flight(key)
+        if leader:
+            self._run_flight(key, flight)
+        elif not flight.done.wait(sum(self.timeout)):
+            raise WeatherError("Timed out waiting for weather data")
+        if flight.error is not None:
+            raise WeatherError(str(flight.error)) from flight.error
+        return flight.data
+
+    def get(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get weather for a location, from the cache when possible.
+
+        Raises:
+            WeatherError: Nothing is cached for the cell and the fetch failed
+        """
+        key = self.cell(lat, lon)
+        # Classify and count under the lock: the client is shared by every
+        # session's thread and the prefetcher
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                outcome = 'misses'
+            else:
+                self._cache.move_to_end(key)
+                age = time.time() - entry.fetched_at
+                if age < self.ttl_seconds:
+                    outcome = 'hits'
+                elif age < self.ttl_seconds + self.stale_seconds:
+                    outcome = 'stale_hits'
+                else:
+                    outcome = 'misses'
+            self.stats[outcome] += 1
+
+        if outcome == 'hits':
+            return entry.data
+        if outcome == 'stale_hits':
+            self._refresh_in_background(key)
+            return entry.data
+
+        try:
+            return self.refresh(lat, lon)
+        except WeatherError:
+            # Serve an expired entry rather than nothing
+            if entry is not None:
+                return entry.data
+            raise
+
+    def record_request(self, lat: float, lon: float) -> None:
+        """
+        Count a user asking for a location. Callers should count each
+        session (not each page rerun) once per cell so a single busy user
+        does not dominate the prefetch targets.
+        """
+        key = self.cell(lat, lon)
+        with self._lock:
+            now = time.time()
+            while now - self._counts_decayed_at >= REQUEST_COUNT_HALF_LIFE_SECONDS:
+                for cell in list(self.request_counts):
+                    self.request_counts[cell] //= 2
+                    if not self.request_counts[cell]:
+                        del self.request_counts[cell]
+                self._counts_decayed_at += REQUEST_COUNT_HALF_LIFE_SECONDS
+            self.request_counts[key] += 1
+            if len(self.request_counts) > MAX_COUNTED_CELLS:
+                self.request_counts = Counter(dict(self.request_counts.most_common(MAX_COUNTED_CELLS // 2)))
+
+    def most_requested(self, n: int):
+        """The n grid cells asked for most often, as [((lat, lon), count), ...]"""
+        with self._lock:
+            return self.request_counts.most_common(n)
+
+    def entry_age(self, lat: float, lon: float) -> Optional[float]:
+        """Seconds since the cell was fetched, or None if it is not cached"""
+        with self._lock:
+            entry = self._cache.get(self.cell(lat, lon))
+        return None if entry is None else time.time() - entry.fetched_at
+
+    def close(self) -> None:
+        self._refresher.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_weather_client() -> WeatherClient:
+    """Get the process-wide weather client, shared by all sessions"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WeatherClient()
+        return _client